@@ -0,0 +1,60 @@
+"""
+Validating command kwargs with a fresh schema per call against
+Command.parse_kwargs, which reuses one schema instance.
+"""
+
+from common import rate
+
+from unplugged import Command, Schema, fields
+from unplugged.schema import INCLUDE
+
+
+class SmallSchema(Schema):
+    name = fields.String(required=True)
+    count = fields.Integer(missing=1)
+
+
+class InnerSchema(Schema):
+    a = fields.String()
+    b = fields.Float()
+
+
+class BigSchema(Schema):
+    name = fields.String(required=True)
+    path = fields.String()
+    force = fields.Boolean(missing=False)
+    limit = fields.Integer()
+    items = fields.List(fields.String())
+    inner = fields.Nested(InnerSchema)
+
+
+CASES = [
+    (SmallSchema, {"name": "x", "extra": 1}),
+    (
+        BigSchema,
+        {
+            "name": "x",
+            "path": "/a",
+            "limit": "5",
+            "items": ["a", "b"],
+            "inner": {"a": "q", "b": "1.5"},
+        },
+    ),
+]
+
+
+def main(number=20000):
+    for schema, kwargs in CASES:
+        command = Command(lambda self: None, name="benchmark", schema=schema)
+        assert command.parse_kwargs(kwargs) == schema().load(kwargs, unknown=INCLUDE)
+
+        fresh = rate(lambda: schema().load(kwargs, unknown=INCLUDE), number)
+        reused = rate(lambda: command.parse_kwargs(kwargs), number)
+        print(
+            f"{schema.__name__}: fresh schema {fresh:,.0f}/s, "
+            f"parse_kwargs {reused:,.0f}/s ({reused / fresh:.1f}x)"
+        )
+
+
+if __name__ == "__main__":
+    main()
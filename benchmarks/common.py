@@ -0,0 +1,37 @@
+"""
+Minimal Django setup shared by the benchmark scripts.
+
+Run a benchmark from the repository root, e.g. python benchmarks/command_kwargs.py
+"""
+
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import django  # noqa: E402
+from django.conf import settings  # noqa: E402
+
+if not settings.configured:
+    settings.configure(
+        DATABASES={
+            "default": {"ENGINE": "django.db.backends.sqlite3", "NAME": ":memory:"}
+        },
+        INSTALLED_APPS=[
+            "django.contrib.auth",
+            "django.contrib.contenttypes",
+            "rest_framework",
+            "unplugged",
+        ],
+        ALLOWED_HOSTS=["*"],
+        SECRET_KEY="benchmark",
+    )
+    django.setup()
+
+
+def rate(fn, number):
+    """
+    Returns how many times per second fn runs, timed over number calls.
+    """
+    return number / timeit.timeit(fn, number=number)
@@ -0,0 +1,66 @@
+"""
+Building the links of 50k JSONAPIObjects with request.build_absolute_uri for
+every url against the per-request AbsoluteURIBuilder.
+"""
+
+import time
+
+import common  # noqa: F401  (configures Django)
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from unplugged import jsonapi
+from unplugged.jsonapi import AbsoluteURIBuilder, JSONAPIObject, JSONAPIRoot
+
+
+class Item:
+    def __init__(self, i):
+        self.i = i
+
+    def get_absolute_url(self):
+        return f"/library/items/{self.i}/"
+
+    def get_additional_urls(self):
+        return {
+            "stream": f"/library/items/{self.i}/stream/",
+            "cover": f"/library/items/{self.i}/cover.jpg",
+        }
+
+
+def build_root(count):
+    root = JSONAPIRoot()
+    for i in range(count):
+        obj = JSONAPIObject("item", i, Item(i))
+        obj["name"] = "name"
+        root.append(obj)
+    return root
+
+
+def measure(name, count):
+    request = Request(APIRequestFactory().get("/", HTTP_HOST="example.com"))
+    root = build_root(count)
+    start = time.perf_counter()
+    data = root.serialize(request)["data"]
+    print(f"{name}: {time.perf_counter() - start:.2f}s, {data[0]['links']}")
+    return data
+
+
+def main(count=50000):
+    request = Request(APIRequestFactory().get("/", HTTP_HOST="example.com:8080"))
+    builder = AbsoluteURIBuilder(request)
+    for url in ["/a/b/", "/a b/", "//evil.com/x", "/a/../b", "rel/x", "/q?x=1#f"]:
+        assert builder(url) == request.build_absolute_uri(url), url
+
+    get_uri_builder = jsonapi.get_uri_builder
+    jsonapi.get_uri_builder = lambda request: request.build_absolute_uri
+    try:
+        previous = measure("build_absolute_uri per url", count)
+    finally:
+        jsonapi.get_uri_builder = get_uri_builder
+
+    current = measure("AbsoluteURIBuilder", count)
+    assert previous == current
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Memory used by 100k JSONAPIObjects and by serializing them in a JSONAPIRoot,
+against the previous layout with an instance __dict__ and eagerly allocated
+relationship containers.
+"""
+
+import gc
+import time
+import tracemalloc
+from collections import defaultdict
+
+import common  # noqa: F401  (configures Django)
+from rest_framework.test import APIRequestFactory
+
+from unplugged.jsonapi import JSONAPIObject, JSONAPIRoot
+
+
+class PreviousJSONAPIObject(dict):
+    root = None
+
+    def __init__(self, type, id, original_object=None, links=None, populated=True):
+        self.id = id
+        self.type = type
+        self.links = links
+        self._relationships = defaultdict(list)
+        self._local_relationships = defaultdict(list)
+        self._original_object = original_object
+        self._populated = populated
+
+    serialize = JSONAPIObject.serialize
+
+
+def measure(object_class, request, count):
+    gc.collect()
+    tracemalloc.start()
+
+    root = JSONAPIRoot()
+    for i in range(count):
+        obj = object_class("item", i)
+        obj["name"] = "name"
+        root.append(obj)
+    built = tracemalloc.get_traced_memory()[0]
+
+    start = time.perf_counter()
+    root.serialize(request)
+    duration = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    print(
+        f"{object_class.__name__}: objects {built / 1e6:.1f} MB, "
+        f"serialize peak {peak / 1e6:.1f} MB, {duration:.2f}s"
+    )
+
+
+def main(count=100000):
+    request = APIRequestFactory().get("/")
+    for object_class in (PreviousJSONAPIObject, JSONAPIObject):
+        measure(object_class, request, count)
+
+
+if __name__ == "__main__":
+    main()
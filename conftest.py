@@ -0,0 +1,48 @@
+import os
+import tempfile
+
+from django.conf import settings
+
+
+def pytest_configure():
+    from apscheduler.schedulers.background import BackgroundScheduler
+
+    db_fd, db_path = tempfile.mkstemp(suffix=".sqlite3")
+    os.close(db_fd)
+
+    settings.configure(
+        DATABASES={
+            "default": {
+                "ENGINE": "django.db.backends.sqlite3",
+                "NAME": db_path,
+                "TEST": {"NAME": db_path},
+            }
+        },
+        INSTALLED_APPS=[
+            "django.contrib.auth",
+            "django.contrib.contenttypes",
+            "rest_framework",
+            "unplugged",
+            "unplugged.services.admin",
+        ],
+        SCHEDULER=BackgroundScheduler(),
+        WAMP_LOG_TOPIC="logs",
+        SECRET_KEY="tests",
+    )
+
+    import django
+    from django.core.management import call_command
+
+    django.setup()
+    call_command("migrate", verbosity=0)
+
+    from unplugged.baseplugin import PluginBase
+
+    class VehiclePlugin(PluginBase):
+        pass
+
+
+def pytest_unconfigure():
+    db_path = settings.DATABASES["default"]["NAME"]
+    if os.path.exists(db_path):
+        os.unlink(db_path)
@@ -1,7 +1,15 @@
 import logging
+import threading
+import time
 from abc import ABCMeta, abstractproperty
 
+from django.core.exceptions import EmptyResultSet, FieldDoesNotExist
+from django.db import DatabaseError
+from django.db.models import Q
+
 from .commands import CommandBaseMeta
+from .conditional import digest_rows
+from .libs.marshmallow_jsonschema import JSONSchema
 from .pluginhandler import pluginhandler
 from .schema import fields
 
@@ -74,36 +82,147 @@ class PluginBase(metaclass=PluginBaseMeta):
         raise NotImplementedError
 
 
+class RelatedPluginEnumCache:
+    """
+    Keeps the enum and enumNames of RelatedPluginField keyed by
+    (plugin_type, plugin_name, traits). Entries are dropped when a plugin
+    they may contain is changed, loaded or unloaded and rebuilt on next use.
+
+    Signals only reach this process, so sync() also clears the cache when the
+    plugin table changed, checking at most every sync_interval seconds.
+    """
+
+    sync_interval = 1.0
+
+    def __init__(self):
+        self.entries = {}
+        self.generation = 0
+        self.plugin_generation = None
+        self.synced_at = None
+        self.lock = threading.Lock()
+
+    def sync(self):
+        from .models import Plugin
+
+        now = time.monotonic()
+        with self.lock:
+            if self.synced_at is not None and now - self.synced_at < self.sync_interval:
+                return
+            self.synced_at = now
+
+        try:
+            plugin_generation = Plugin.objects.get_generation()
+        except DatabaseError:
+            logger.debug("Unable to read the plugin generation")
+            return
+
+        with self.lock:
+            changed = plugin_generation != self.plugin_generation
+            self.plugin_generation = plugin_generation
+
+        if changed:
+            self.clear()
+
+    def get_generation(self):
+        self.sync()
+        return self.generation
+
+    def get(self, key, build):
+        self.sync()
+        with self.lock:
+            entry = self.entries.get(key)
+            generation = self.generation
+
+        if entry is None:
+            entry = build()
+            with self.lock:
+                if self.generation == generation:
+                    self.entries[key] = entry
+
+        return entry
+
+    def invalidate(self, plugin_type, plugin_name):
+        JSONSchema.clear_cache()
+        with self.lock:
+            self.generation += 1
+            for key in list(self.entries.keys()):
+                key_plugin_type, key_plugin_name, _ = key
+                if key_plugin_type not in (None, plugin_type):
+                    continue
+                if key_plugin_name not in (None, plugin_name):
+                    continue
+                del self.entries[key]
+
+    def clear(self):
+        JSONSchema.clear_cache()
+        with self.lock:
+            self.generation += 1
+            self.entries = {}
+
+
+related_plugin_enum_cache = RelatedPluginEnumCache()
+JSONSchema.cache_checks.append(related_plugin_enum_cache.sync)
+
+
 class RelatedPluginField(fields.Field):
+    jsonschema_cacheable = True  # related_plugin_enum_cache clears memoized dumps
+
     def _jsonschema_type_mapping(self):
+        plugin_type = getattr(self.metadata.get("plugin_type"), "plugin_type", None)
+        plugin_name = getattr(self.metadata.get("plugin_name"), "plugin_name", None)
+        traits_required = frozenset(self.metadata.get("traits", []))
+
+        enum, enum_names = related_plugin_enum_cache.get(
+            (plugin_type, plugin_name, traits_required),
+            lambda: self._build_enum(plugin_type, plugin_name, traits_required),
+        )
+
+        if not enum:
+            return {"type": "number", "enum": [0], "enumNames": ["No plugins added"]}
+
+        return {
+            "type": "number",
+            "enum": list(enum),
+            "enumNames": list(enum_names),
+        }
+
+    def _build_enum(self, plugin_type, plugin_name, traits_required):
         from .models import Plugin
 
         plugins = Plugin.objects.filter(enabled=True)
+        if hasattr(Plugin, "simpleadminplugin_set"):
+            plugins = plugins.prefetch_related("simpleadminplugin_set__template")
 
-        plugin_type = getattr(self.metadata.get("plugin_type"), "plugin_type", None)
         if plugin_type:
             plugins = plugins.filter(plugin_type=plugin_type)
 
-        plugin_name = getattr(self.metadata.get("plugin_name"), "plugin_name", None)
         if plugin_name:
             plugins = plugins.filter(plugin_name=plugin_name)
 
-        traits_required = set(self.metadata.get("traits", []))
-        plugins = [
-            p
-            for p in plugins
-            if p.can_plugin_be_loaded()
-            and not traits_required - set(p.get_plugin().__traits__)
-        ]
+        if traits_required:
+            if plugin_type:
+                plugin_types = [plugin_type]
+            else:
+                plugin_types = list(pluginhandler.plugins.keys())
 
-        if not plugins:
-            return {"type": "number", "enum": [0], "enumNames": ["No plugins added"]}
+            with_traits = Q(pk__in=[])
+            for t in plugin_types:
+                plugin_classes = pluginhandler.get_plugins_with_traits(
+                    t, traits_required
+                )
+                if plugin_classes:
+                    with_traits |= Q(
+                        plugin_type=t,
+                        plugin_name__in=[c.plugin_name for c in plugin_classes],
+                    )
+            plugins = plugins.filter(with_traits)
 
-        return {
-            "type": "number",
-            "enum": [p.pk for p in plugins],
-            "enumNames": [p.get_display_name() for p in plugins],
-        }
+        plugins = [p for p in plugins if p.can_plugin_be_loaded()]
+
+        return (
+            tuple(p.pk for p in plugins),
+            tuple(p.get_display_name() for p in plugins),
+        )
 
     def _deserialize(self, value, attr, data, **kwargs):
         from .models import Plugin
@@ -115,9 +234,80 @@ class RelatedPluginField(fields.Field):
             return None
 
 
+model_lookups = {}  # lookup name mapped to the DjangoModelField serving it
+
+
 class DjangoModelField(fields.Field):
+    """
+    A reference to a Django model instance, with queryset and name_field passed as metadata.
+
+    The JSON Schema normally lists every object in the queryset. With lookup=True,
+    or lookup="name", the schema instead refers to a lookup that clients search
+    and page through with the admin service. lookup=True names the lookup after
+    model and name_field, fields using another queryset need a name of their own.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        lookup = self.metadata.get("lookup")
+        if lookup:
+            if lookup is True:
+                lookup = self.get_default_lookup_name()
+            self.metadata["lookup"] = lookup
+            existing = model_lookups.get(lookup)
+            if existing is not None and not self.serves_same_lookup(existing):
+                raise ValueError(
+                    f"Lookup {lookup} is already registered with another queryset"
+                )
+            model_lookups[lookup] = self
+
+    @property
+    def jsonschema_cacheable(self):
+        return bool(self.metadata.get("lookup"))
+
+    def get_lookup_signature(self):
+        queryset = self.metadata["queryset"]
+        try:
+            query = str(queryset.query)
+        except EmptyResultSet:
+            query = None
+        return (queryset.model, query, self.metadata.get("name_field", "pk"))
+
+    def serves_same_lookup(self, other):
+        """
+        Returns True if other lists the same objects with the same names,
+        e.g. the same field declared again on a newly created schema class.
+        """
+        return self.get_lookup_signature() == other.get_lookup_signature()
+
+    def get_default_lookup_name(self):
+        model = self.metadata["queryset"].model
+        name_field = self.metadata.get("name_field", "pk")
+        return f"{model._meta.label_lower}.{name_field}"
+
+    def get_enum_generation(self):
+        """
+        Returns a digest of the objects and names the JSON Schema enum lists,
+        read from the database so changes made anywhere are seen.
+        """
+        queryset = self.metadata["queryset"]
+        name_field = self.metadata.get("name_field", "pk")
+        if name_field != "pk":
+            try:
+                queryset.model._meta.get_field(name_field)
+            except FieldDoesNotExist:
+                return digest_rows(
+                    (obj.pk, getattr(obj, name_field)) for obj in queryset.all()
+                )
+
+        return digest_rows(queryset.values_list("pk", name_field))
+
     def _jsonschema_type_mapping(self):
-        queryset = self.metadata.get("queryset", [])
+        lookup = self.metadata.get("lookup")
+        if lookup:
+            return {"type": "number", "lookup": lookup}
+
+        queryset = self.metadata["queryset"].all()  # the declared queryset caches rows
         name_field = self.metadata.get("name_field", "pk")
         objs = [obj for obj in queryset]
 
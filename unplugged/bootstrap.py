@@ -5,6 +5,7 @@ from wampyre.realm import realm_manager
 from wampyre.transports.autowamp import ApplicationRunner
 
 from .models import LogNotificationComponent, Plugin
+from .rpc import CommandRPCComponent
 from .scheduler import schedule_manager
 from .signals import wamp_realm_created, wamp_realm_discarded
 
@@ -18,7 +19,11 @@ def handle_wampyre_callback(callback_type, realm):
 
 def bootstrap_all():
     schedule_manager.start()
-    Plugin.objects.bootstrap()
+    schedule_manager.prefetch_schedules()
+    try:
+        Plugin.objects.bootstrap()
+    finally:
+        schedule_manager.clear_prefetched_schedules()
 
     content_type = ContentType.objects.get_for_model(Plugin)
     perm, _ = Permission.objects.get_or_create(
@@ -29,3 +34,4 @@ def bootstrap_all():
     realm_manager.register_callback(handle_wampyre_callback)
 
     ApplicationRunner(settings.WAMP_REALM).run(LogNotificationComponent)
+    ApplicationRunner(settings.WAMP_REALM).run(CommandRPCComponent)
@@ -1,18 +1,48 @@
 import inspect
+import json
 import logging
+import time
+from collections.abc import Iterator
 from functools import wraps
 
-from django.http import HttpResponse
+from django.http import HttpResponse, StreamingHttpResponse
 from rest_framework import serializers, status
 from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
 
 from .jsonapi import JSONAPIObject, JSONAPIRoot
 from .jsonschema import dump_ui_schema
 from .libs.marshmallow_jsonschema import JSONSchema
+from .metrics import command_metrics
 from .schema import INCLUDE, Schema, ValidationError
 
 logger = logging.getLogger(__name__)
 
+NDJSON_CONTENT_TYPE = "application/x-ndjson"
+
+
+def stream_ndjson(iterable, request):
+    """
+    Encodes each item of an iterable as a line of JSON, only pulling
+    the next item when the previous one has been sent.
+
+    A JSONAPIObject is written as a JSONAPI document of its own, with the
+    objects it has relationships to as included.
+    """
+    try:
+        for item in iterable:
+            if isinstance(item, JSONAPIObject):
+                jsonapi_root = JSONAPIRoot()
+                jsonapi_root.extend([item])
+                item = jsonapi_root.serialize(request)
+            yield json.dumps(item, cls=JSONEncoder) + "\n"
+    except Exception:
+        logger.exception(f"Failed while streaming result from {iterable!r}")
+        jsonapi_root = JSONAPIRoot.error_status(
+            id_="execution_failed", detail="Failed to execute command"
+        )
+        yield json.dumps(jsonapi_root.serialize(request), cls=JSONEncoder) + "\n"
+
 
 class CommandViewMixin:
     def call_command(self, request, obj, additional_kwargs=None):
@@ -73,6 +103,12 @@ class CommandViewMixin:
         if isinstance(command_result, JSONAPIRoot):
             return Response(command_result.serialize(request))
 
+        if isinstance(command_result, Iterator):
+            return StreamingHttpResponse(
+                stream_ndjson(command_result, request),
+                content_type=NDJSON_CONTENT_TYPE,
+            )
+
         jsonapi_root = JSONAPIRoot.success_status(command_result)
         return Response(jsonapi_root.serialize(request))
 
@@ -133,17 +169,56 @@ class Command:
         self.schema = schema or Schema
         self.metadata = metadata or {}
         self.need_request = need_request
+        self._compiled_schema = None
+
+    @property
+    def compiled_schema(self):
+        """
+        Schema instance used to validate kwargs, built once as loading is stateless.
+        """
+        if self._compiled_schema is None:
+            self._compiled_schema = self.schema()
+        return self._compiled_schema
 
     def parse_kwargs(self, kwargs):
-        return self.schema().load(kwargs, unknown=INCLUDE)
+        return self.compiled_schema.load(kwargs, unknown=INCLUDE)
 
     def execute(self, kwargs):
+        plugin = kwargs.get("self")
+        labels = (
+            getattr(plugin, "plugin_type", ""),
+            getattr(plugin, "name", ""),
+            self.name,
+        )
+        start = time.perf_counter()
         try:
             result = self.fn(**kwargs)
         except:
+            command_metrics.observe(labels, time.perf_counter() - start, failed=True)
+            raise
+
+        if isinstance(result, Iterator):
+            return self._observe_iterator(labels, start, result)
+
+        command_metrics.observe(labels, time.perf_counter() - start)
+        return result
+
+    def _observe_iterator(self, labels, start, iterator):
+        """
+        Passes on the items of an iterator result, recording the call when
+        iteration finishes or fails. Iteration stopped early is not recorded.
+        """
+        try:
+            yield from iterator
+        except GeneratorExit:
+            # Closed before the end, e.g. by a client disconnect, so the
+            # command neither succeeded nor failed.
+            raise
+        except:
+            command_metrics.observe(labels, time.perf_counter() - start, failed=True)
             raise
         else:
-            return result
+            command_metrics.observe(labels, time.perf_counter() - start)
 
 
 def command(
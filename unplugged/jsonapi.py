@@ -1,12 +1,130 @@
-from collections import defaultdict
+import re
+from collections import deque
+from itertools import islice
+
+# Paths that Django's build_absolute_uri would append as-is to scheme and host.
+SIMPLE_PATH_RE = re.compile(r"^/(?!/)[A-Za-z0-9\-._~/%!$&'()*+,;=:@?#\[\]]*$")
+
+
+class AbsoluteURIBuilder:
+    """
+    Builds absolute uris for one request, resolving scheme and host only once.
+    """
+
+    def __init__(self, request):
+        self.request = request
+        self.prefix = request.build_absolute_uri("/")[:-1]
+
+    def __call__(self, url):
+        if (
+            isinstance(url, str)
+            and SIMPLE_PATH_RE.match(url)
+            and "/./" not in url
+            and "/../" not in url
+        ):
+            return self.prefix + url
+        return self.request.build_absolute_uri(url)
+
+
+def get_uri_builder(request):
+    """
+    Returns the AbsoluteURIBuilder for a request, creating it on first use.
+    """
+    builder = getattr(request, "_uri_builder", None)
+    if builder is None:
+        builder = request._uri_builder = AbsoluteURIBuilder(request)
+    return builder
+
+
+def _build_absolute_uri(request, url):
+    """
+    Turns url into an absolute uri. Without a request, e.g. when called over RPC,
+    the url is returned untouched.
+    """
+    if request is None:
+        return url
+    return get_uri_builder(request)(url)
+
+
+FIELDS_PARAMETER_RE = re.compile(r"^fields\[(.+)\]$")
+
+
+def get_sparse_fieldsets(request):
+    """
+    Returns the attributes requested per type with fields[type]=a,b parameters.
+    """
+    if request is None:
+        return {}
+
+    fieldsets = {}
+    for key, value in request.GET.items():
+        m = FIELDS_PARAMETER_RE.match(key)
+        if m:
+            fieldsets[m.group(1)] = set(field for field in value.split(",") if field)
+
+    return fieldsets
+
+
+def get_page_parameters(request):
+    """
+    Returns offset and limit from page[offset] and page[limit] parameters,
+    limit is None if the client did not ask for one.
+    """
+    if request is None:
+        return 0, None
+
+    try:
+        offset = max(int(request.GET.get("page[offset]", 0)), 0)
+        limit = request.GET.get("page[limit]")
+        if limit is not None:
+            limit = max(int(limit), 1)
+    except ValueError:
+        return 0, None
+
+    return offset, limit
+
+
+def get_page_links(request, offset, limit, has_next):
+    """
+    Returns next and prev links for the page described by offset and limit.
+    """
+    links = {}
+    if limit is None:
+        return links
+
+    def build_link(page_offset):
+        query = request.GET.copy()
+        query["page[offset]"] = page_offset
+        query["page[limit]"] = limit
+        return request.build_absolute_uri(f"{request.path}?{query.urlencode()}")
+
+    if has_next:
+        links["next"] = build_link(offset + limit)
+
+    if offset > 0:
+        links["prev"] = build_link(max(offset - limit, 0))
+
+    return links
 
 
 class JSONAPIObject(dict):
     """
     A JSONAPI data item.
+
+    Relationship containers are only allocated when a relationship is added,
+    as most objects in a listing have none.
     """
 
-    root = None
+    __slots__ = (
+        "id",
+        "type",
+        "links",
+        "root",
+        "_relationships",
+        "_local_relationships",
+        "_original_object",
+        "_populated",
+    )
 
     def __init__(self, type, id, original_object=None, links=None, populated=True):
         """
@@ -18,28 +136,36 @@ class JSONAPIObject(dict):
         self.id = id
         self.type = type
         self.links = links
-        self._relationships = defaultdict(list)
-        self._local_relationships = defaultdict(list)
+        self.root = None
+        self._relationships = None
+        self._local_relationships = None
         self._original_object = original_object
         self._populated = populated
 
-    def serialize(self, request):
+    def serialize(self, request, fields=None):
         """
         Turns this object into a plain JSON API object ready to be JSON encoded.
+
+        :param fields: Only include these attributes, all attributes are included if None.
         """
         obj = {"type": self.type, "id": self.id}
         if self._populated:
-            obj["attributes"] = dict(self)
+            if fields is None:
+                obj["attributes"] = dict(self)
+            else:
+                obj["attributes"] = {k: v for k, v in self.items() if k in fields}
 
         relationships = {}
-        for relationship_type, relationship_list in self._relationships.items():
+        remote_relationships = self._relationships or {}
+        for relationship_type, relationship_list in remote_relationships.items():
             r = []
             for relationship in relationship_list:
                 r.append({"type": relationship.type, "id": relationship.id})
             if r:
                 relationships[relationship_type] = {"data": r}
 
-        for relationship_type, relationship_list in self._local_relationships.items():
+        local_relationships = self._local_relationships or {}
+        for relationship_type, relationship_list in local_relationships.items():
             r = []
             for relationship in relationship_list:
                 r.append(relationship.serialize(request))
@@ -55,19 +181,19 @@ class JSONAPIObject(dict):
         if self._original_object and hasattr(self._original_object, "get_absolute_url"):
             url = self._original_object.get_absolute_url()
             if url:
-                url = request.build_absolute_uri(url)
+                url = _build_absolute_uri(request, url)
                 if url:
                     links["self"] = url
 
         if isinstance(links.get("self"), str) and links["self"].startswith("/"):
-            links["self"] = request.build_absolute_uri(links["self"])
+            links["self"] = _build_absolute_uri(request, links["self"])
 
         if self._original_object and hasattr(
             self._original_object, "get_additional_urls"
         ):
             urls = self._original_object.get_additional_urls()
             for k, url in urls.items():
-                url = request.build_absolute_uri(url)
+                url = _build_absolute_uri(request, url)
                 if url:
                     links[k] = url
 
@@ -81,23 +207,33 @@ class JSONAPIObject(dict):
 
     def add_relationship(self, type, obj, local=False):
         if local:
-            self._local_relationships[type].append(obj)
+            if self._local_relationships is None:
+                self._local_relationships = {}
+            self._local_relationships.setdefault(type, []).append(obj)
         else:
-            self._relationships[type].append(obj)
-            self.root.add_included(obj)
+            if self._relationships is None:
+                self._relationships = {}
+            self._relationships.setdefault(type, []).append(obj)
+            if self.root is not None:
+                self.root.add_included(obj)
 
 
 class JSONAPIRoot:
     """
     A base to serialize listings to proper JSONAPI format.
+
+    A single data object is serialized as an object, except in a page of data
+    which is always a list.
     """
 
     def __init__(self):
         self.data = []
+        self.lazy_data = []  # iterables of JSONAPIObject, consumed when serializing
         self.included = {}  # ('type', 'id') keys mapped to a JSONAPIObject
         self.links = {}
         self.meta = {}
         self.errors = {}
+        self.paginate = True  # False if data is already a single page and links are set
 
     def append(self, obj):
         """
@@ -106,6 +242,13 @@ class JSONAPIRoot:
         obj.root = self
         self.data.append(obj)
 
+    def extend(self, objs):
+        """
+        Appends objects from an iterable. The iterable is not consumed until the
+        root is serialized, and only up to the requested page.
+        """
+        self.lazy_data.append(objs)
+
     def add_included(self, obj):
         """
         Appends a new object that should be included (and referenced by objects in data)
@@ -113,16 +256,74 @@ class JSONAPIRoot:
         obj.root = self
         self.included[(obj.type, obj.id)] = obj
 
+    def _iter_data(self):
+        yield from self.data
+
+        for objs in self.lazy_data:
+            for obj in objs:
+                obj.root = self
+                if obj._relationships:
+                    for relationship_list in obj._relationships.values():
+                        for relationship in relationship_list:
+                            self.add_included(relationship)
+                yield obj
+
+    def _iter_page(self, offset, limit, page):
+        """
+        Yields the data objects within offset and limit, setting page["has_next"]
+        if there are more objects after them.
+        """
+        data = self._iter_data()
+        if offset or limit is not None:
+            stop = None if limit is None else offset + limit + 1
+            data = islice(data, offset, stop)
+
+        for i, obj in enumerate(data):
+            if i == limit:
+                page["has_next"] = True
+                break
+            yield obj
+
+    def _get_page_included(self, objs):
+        """
+        Returns the included objects referenced, directly or through other
+        included objects, by objs.
+        """
+        included = {}
+        pending = deque(objs)
+        while pending:
+            obj = pending.popleft()
+            for relationship_list in (obj._relationships or {}).values():
+                for relationship in relationship_list:
+                    key = (relationship.type, relationship.id)
+                    if key not in included:
+                        included[key] = self.included.get(key, relationship)
+                        pending.append(included[key])
+
+        return included.values()
+
     def _serialize_success(self, request):
+        fieldsets = get_sparse_fieldsets(request)
+        offset, limit = get_page_parameters(request) if self.paginate else (0, None)
+        paginated = bool(offset) or limit is not None
+        many = paginated or not self.paginate
+        page = {"has_next": False}
+
+        objs = list(self._iter_page(offset, limit, page))
         data = []
-        for obj in self.data:
-            data.append(obj.serialize(request))
+        for obj in objs:
+            data.append(obj.serialize(request, fieldsets.get(obj.type)))
+
+        if paginated:
+            included_objs = self._get_page_included(objs)
+        else:
+            included_objs = self.included.values()
 
         included = []
-        for obj in self.included.values():
-            included.append(obj.serialize(request))
+        for obj in included_objs:
+            included.append(obj.serialize(request, fieldsets.get(obj.type)))
 
-        if len(data) == 1:
+        if len(data) == 1 and not many:
             data = data[0]
 
         obj = {"data": data, "included": included}
@@ -130,8 +331,12 @@ class JSONAPIRoot:
         if self.meta:
             obj["meta"] = self.meta
 
-        if self.links:
-            obj["links"] = self.links
+        links = dict(self.links)
+        if paginated:
+            links.update(get_page_links(request, offset, limit, page["has_next"]))
+
+        if links:
+            obj["links"] = links
 
         return obj
 
@@ -1,6 +1,8 @@
 import datetime
 import decimal
+import threading
 import uuid
+import weakref
 from inspect import isclass
 
 from marshmallow import Schema, fields, missing, validate
@@ -42,22 +44,65 @@ FIELD_VALIDATORS = {
 }
 
 
+def _copy_dumped(value):
+    """Copy the dicts and lists of a dumped schema so a cached dump is never modified."""
+    if isinstance(value, dict):
+        return {k: _copy_dumped(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_copy_dumped(v) for v in value]
+    return value
+
+
+def _freeze_option(value):
+    if value is None:
+        return None
+    if isinstance(value, (set, frozenset, list, tuple)):
+        return frozenset(value)
+    return value
+
+
 class JSONSchema(Schema):
-    """Converts to JSONSchema as defined by http://json-schema.org/."""
+    """Converts to JSONSchema as defined by http://json-schema.org/.
+
+    Dumps are memoized per schema class and options. Fields with a
+    _jsonschema_type_mapping method make a dump uncacheable unless they set
+    jsonschema_cacheable, those fields must call clear_cache() when their
+    output changes. Callables in cache_checks run before every top level dump,
+    letting them call clear_cache() for changes they can only detect by polling.
+    """
 
     properties = fields.Method("get_properties")
     type = fields.Constant("object")
     required = fields.Method("get_required")
 
+    _default_mappings = {}  # id of a TYPE_MAPPING mapped to it and its field mapping
+    _dump_cache = weakref.WeakKeyDictionary()  # schema class mapped to dumps by key
+    _cache_generation = 0
+    _cache_lock = threading.Lock()
+    cache_checks = []
+
     def __init__(self, *args, **kwargs):
         """Setup internal cache of nested fields, to prevent recursion."""
         self._nested_schema_classes = {}
+        self._cacheable = True
         self.nested = kwargs.pop("nested", False)
         super(JSONSchema, self).__init__(*args, **kwargs)
 
+    @classmethod
+    def clear_cache(cls):
+        """Forget all memoized dumps."""
+        with JSONSchema._cache_lock:
+            JSONSchema._cache_generation += 1
+            JSONSchema._dump_cache = weakref.WeakKeyDictionary()
+
     def _get_default_mapping(self, obj):
         """Return default mapping if there are no special needs."""
-        mapping = {v: k for k, v in obj.TYPE_MAPPING.items()}
+        type_mapping = obj.TYPE_MAPPING
+        entry = self._default_mappings.get(id(type_mapping))
+        if entry is not None and entry[0] is type_mapping:
+            return entry[1]
+
+        mapping = {v: k for k, v in type_mapping.items()}
         mapping.update(
             {
                 fields.Email: text_type,
@@ -67,6 +112,7 @@ class JSONSchema(Schema):
                 fields.Nested: "_from_nested_schema",
             }
         )
+        self._default_mappings[id(type_mapping)] = (type_mapping, mapping)
         return mapping
 
     def get_properties(self, obj):
@@ -122,6 +168,8 @@ class JSONSchema(Schema):
         """Get schema and validators for field."""
         mapping = self._get_default_mapping(obj)
         if hasattr(field, "_jsonschema_type_mapping"):
+            if not getattr(field, "jsonschema_cacheable", False):
+                self._cacheable = False
             schema = field._jsonschema_type_mapping()
         elif "_jsonschema_type_mapping" in field.metadata:
             schema = field.metadata["_jsonschema_type_mapping"]
@@ -157,6 +205,8 @@ class JSONSchema(Schema):
 
         wrapped_nested = self.__class__(nested=True)
         wrapped_dumped = wrapped_nested.dump(nested_instance)
+        if not wrapped_nested._cacheable:
+            self._cacheable = False
 
         # NOTE: doubled up to maintain backwards compatibility
         metadata = field.metadata.get("metadata", {})
@@ -197,6 +247,8 @@ class JSONSchema(Schema):
         if name not in self._nested_schema_classes and name != outer_name:
             wrapped_nested = self.__class__(nested=True)
             wrapped_dumped = wrapped_nested.dump(nested_instance)
+            if not wrapped_nested._cacheable:
+                self._cacheable = False
 
             # Handle change in return value type between Marshmallow
             # versions 2 and 3.
@@ -226,10 +278,56 @@ class JSONSchema(Schema):
 
         return schema
 
+    def _get_cache_key(self, obj, kwargs):
+        if kwargs or not isinstance(obj, Schema):
+            return None
+
+        return (
+            self.__class__,
+            _freeze_option(obj.only),
+            _freeze_option(obj.exclude),
+            _freeze_option(obj.load_only),
+            _freeze_option(obj.dump_only),
+            obj.many,
+        )
+
     def dump(self, obj, **kwargs):
         """Take obj for later use: using class name to namespace definition."""
         self.obj = obj
-        return super(JSONSchema, self).dump(obj, **kwargs)
+
+        key = self._get_cache_key(obj, kwargs)
+        if key is None:
+            return super(JSONSchema, self).dump(obj, **kwargs)
+
+        if not self.nested:
+            for cache_check in JSONSchema.cache_checks:
+                cache_check()
+
+        with JSONSchema._cache_lock:
+            generation = JSONSchema._cache_generation
+            cached = JSONSchema._dump_cache.get(obj.__class__, {}).get(key)
+
+        if cached is not None:
+            dumped, definitions = cached
+            self._nested_schema_classes.update(_copy_dumped(definitions))
+            return _copy_dumped(dumped)
+
+        existing_definitions = set(self._nested_schema_classes.keys())
+        self._cacheable = True
+        dumped = super(JSONSchema, self).dump(obj, **kwargs)
+
+        if self._cacheable:
+            definitions = {
+                k: v
+                for k, v in self._nested_schema_classes.items()
+                if k not in existing_definitions
+            }
+            cached = (_copy_dumped(dumped), _copy_dumped(definitions))
+            with JSONSchema._cache_lock:
+                if generation == JSONSchema._cache_generation:
+                    JSONSchema._dump_cache.setdefault(obj.__class__, {})[key] = cached
+
+        return dumped
 
     # @post_dump
     # def wrap(self, data, **_):
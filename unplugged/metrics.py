@@ -0,0 +1,139 @@
+"""
+Low overhead counters and latency histograms, rendered in the Prometheus text format.
+"""
+
+import threading
+from bisect import bisect_left
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def bucket_quantile(buckets, counts, quantile):
+    """
+    Estimates a quantile from histogram counts, interpolating within the bucket
+    it falls in. counts has one more item than buckets for values above the last bucket.
+    """
+    total = sum(counts)
+    if not total:
+        return None
+
+    rank = quantile * total
+    cumulative = 0
+    for i, count in enumerate(counts):
+        if count and cumulative + count >= rank:
+            if i == len(buckets):
+                return buckets[-1]
+            lower = buckets[i - 1] if i else 0.0
+            return lower + (buckets[i] - lower) * (rank - cumulative) / count
+        cumulative += count
+
+    return buckets[-1]
+
+
+def escape_label_value(value):
+    return str(value).replace("\\", r"\\").replace("\n", r"\n").replace('"', r"\"")
+
+
+class LatencySeries:
+    def __init__(self, bucket_count):
+        self.calls = 0
+        self.errors = 0
+        self.total = 0.0
+        self.buckets = [0] * (bucket_count + 1)
+
+
+class LatencyMetric:
+    """
+    Call count, error count and latency histogram keyed by a tuple of label values.
+    """
+
+    def __init__(self, name, description, labelnames, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.description = description
+        self.labelnames = labelnames
+        self.buckets = buckets
+        self.series = {}
+        self.lock = threading.Lock()
+
+    def observe(self, labels, duration, failed=False):
+        bucket = bisect_left(self.buckets, duration)
+        with self.lock:
+            series = self.series.get(labels)
+            if series is None:
+                series = self.series[labels] = LatencySeries(len(self.buckets))
+            series.calls += 1
+            series.total += duration
+            series.buckets[bucket] += 1
+            if failed:
+                series.errors += 1
+
+    def clear(self):
+        with self.lock:
+            self.series = {}
+
+    def _format_labels(self, labels, **extra):
+        pairs = list(zip(self.labelnames, labels)) + list(extra.items())
+        return ",".join(f'{k}="{escape_label_value(v)}"' for k, v in pairs)
+
+    def render(self):
+        with self.lock:
+            series = [
+                (labels, s.calls, s.errors, s.total, list(s.buckets))
+                for labels, s in sorted(self.series.items())
+            ]
+
+        lines = [
+            f"# HELP {self.name}_calls_total {self.description}, number of calls.",
+            f"# TYPE {self.name}_calls_total counter",
+        ]
+        for labels, calls, errors, total, buckets in series:
+            lines.append(
+                f"{self.name}_calls_total{{{self._format_labels(labels)}}} {calls}"
+            )
+
+        lines += [
+            f"# HELP {self.name}_errors_total {self.description}, number of failed calls.",
+            f"# TYPE {self.name}_errors_total counter",
+        ]
+        for labels, calls, errors, total, buckets in series:
+            lines.append(
+                f"{self.name}_errors_total{{{self._format_labels(labels)}}} {errors}"
+            )
+
+        lines += [
+            f"# HELP {self.name}_duration_seconds {self.description}, call latency.",
+            f"# TYPE {self.name}_duration_seconds histogram",
+        ]
+        for labels, calls, errors, total, buckets in series:
+            cumulative = 0
+            for le, count in zip(self.buckets + ("+Inf",), buckets):
+                cumulative += count
+                lines.append(
+                    f"{self.name}_duration_seconds_bucket{{{self._format_labels(labels, le=le)}}} {cumulative}"
+                )
+            lines.append(
+                f"{self.name}_duration_seconds_sum{{{self._format_labels(labels)}}} {total}"
+            )
+            lines.append(
+                f"{self.name}_duration_seconds_count{{{self._format_labels(labels)}}} {calls}"
+            )
+
+        return "\n".join(lines) + "\n"
+
+
+command_metrics = LatencyMetric(
+    "unplugged_command",
+    "Plugin command executions",
+    ("plugin_type", "plugin_name", "command"),
+)
+schedule_metrics = LatencyMetric(
+    "unplugged_schedule",
+    "Scheduled command runs",
+    ("plugin_type", "plugin_name", "command"),
+)
+
+METRICS = [command_metrics, schedule_metrics]
+
+
+def render_metrics():
+    return "".join(metric.render() for metric in METRICS)
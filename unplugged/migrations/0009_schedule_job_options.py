@@ -0,0 +1,26 @@
+# Generated by Django 3.0.14 on 2026-10-19 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [("unplugged", "0008_auto_20190715_1944")]
+
+    operations = [
+        migrations.AddField(
+            model_name="schedule",
+            name="coalesce",
+            field=models.BooleanField(default=True),
+        ),
+        migrations.AddField(
+            model_name="schedule",
+            name="max_instances",
+            field=models.PositiveIntegerField(default=1),
+        ),
+        migrations.AddField(
+            model_name="schedule",
+            name="misfire_grace_time",
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+    ]
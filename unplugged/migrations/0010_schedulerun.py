@@ -0,0 +1,53 @@
+# Generated by Django 3.0.14 on 2026-10-19 12:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [("unplugged", "0009_schedule_job_options")]
+
+    operations = [
+        migrations.CreateModel(
+            name="ScheduleRun",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("planned_datetime", models.DateTimeField(null=True)),
+                ("start_datetime", models.DateTimeField()),
+                ("duration", models.FloatField()),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[("success", "Success"), ("failed", "Failed")],
+                        max_length=10,
+                    ),
+                ),
+                (
+                    "log",
+                    models.ForeignKey(
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        to="unplugged.Log",
+                    ),
+                ),
+                (
+                    "schedule",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="runs",
+                        to="unplugged.Schedule",
+                    ),
+                ),
+            ],
+            options={"ordering": ("-pk",)},
+        ),
+    ]
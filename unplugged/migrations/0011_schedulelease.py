@@ -0,0 +1,29 @@
+# Generated by Django 3.0.14 on 2026-10-19 12:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [("unplugged", "0010_schedulerun")]
+
+    operations = [
+        migrations.CreateModel(
+            name="ScheduleLease",
+            fields=[
+                (
+                    "schedule",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="lease",
+                        serialize=False,
+                        to="unplugged.Schedule",
+                    ),
+                ),
+                ("owner", models.CharField(db_index=True, max_length=200)),
+                ("expires", models.DateTimeField(db_index=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,16 @@
+# Generated by Django 3.0.14 on 2026-10-19 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [("unplugged", "0011_schedulelease")]
+
+    operations = [
+        migrations.AddField(
+            model_name="schedule",
+            name="jitter",
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 3.0.14 on 2026-10-19 12:00
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [("unplugged", "0012_schedule_jitter")]
+
+    operations = [
+        migrations.AlterField(
+            model_name="logmessage",
+            name="datetime",
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
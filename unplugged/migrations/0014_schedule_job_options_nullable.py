@@ -0,0 +1,34 @@
+# Generated by Django 3.0.14 on 2026-10-19 12:00
+
+from django.db import migrations, models
+
+
+def clear_default_job_options(apps, schema_editor):
+    Schedule = apps.get_model("unplugged", "Schedule")
+    Schedule.objects.filter(max_instances=1).update(max_instances=None)
+    Schedule.objects.filter(coalesce=True).update(coalesce=None)
+
+
+def restore_default_job_options(apps, schema_editor):
+    Schedule = apps.get_model("unplugged", "Schedule")
+    Schedule.objects.filter(max_instances__isnull=True).update(max_instances=1)
+    Schedule.objects.filter(coalesce__isnull=True).update(coalesce=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [("unplugged", "0013_logmessage_datetime_default")]
+
+    operations = [
+        migrations.AlterField(
+            model_name="schedule",
+            name="coalesce",
+            field=models.BooleanField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name="schedule",
+            name="max_instances",
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.RunPython(clear_default_job_options, restore_default_job_options),
+    ]
@@ -0,0 +1,16 @@
+# Generated by Django 3.0.14 on 2026-10-19 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [("unplugged", "0014_schedule_job_options_nullable")]
+
+    operations = [
+        migrations.AddField(
+            model_name="schedule",
+            name="version",
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
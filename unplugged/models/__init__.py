@@ -1,6 +1,12 @@
-from .log import Log, LogMessage, LogNotificationComponent
+from .log import Log, LogMessage, LogNotificationComponent, capture_log_chains
 from .plugin import Plugin, PluginCache
-from .scheduler import FailedToParseScheduleException, Schedule, parse_schedule_trigger
+from .scheduler import (
+    FailedToParseScheduleException,
+    Schedule,
+    ScheduleLease,
+    ScheduleRun,
+    parse_schedule_trigger,
+)
 
 __all__ = [
     "Log",
@@ -9,6 +15,9 @@ __all__ = [
     "PluginCache",
     "Plugin",
     "Schedule",
+    "ScheduleLease",
+    "ScheduleRun",
     "FailedToParseScheduleException",
     "parse_schedule_trigger",
+    "capture_log_chains",
 ]
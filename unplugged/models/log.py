@@ -1,19 +1,172 @@
+import atexit
 import json
 import logging
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
 
 from autobahn.twisted.wamp import ApplicationSession
 from django.conf import settings
-from django.db import models
+from django.db import close_old_connections, connection, models
 from django.db.models.signals import post_save
 from django.utils.timezone import now
 
+from ..signals import log_messages_created
 from .plugin import Plugin
 
 logger = logging.getLogger(__name__)
 
+_captured_logs = threading.local()
+
+
+@contextmanager
+def capture_log_chains():
+    """
+    Collects the logs of chains started in this thread while the context is active.
+    """
+    previous_logs = getattr(_captured_logs, "logs", None)
+    logs = _captured_logs.logs = []
+    try:
+        yield logs
+    finally:
+        _captured_logs.logs = previous_logs
+
+
+class LogMessageWriter:
+    """
+    Writes the messages of buffered log chains with bulk_create from a background
+    thread, when settings.LOG_MESSAGE_BATCH_SIZE (100 if not set) messages are
+    waiting or settings.LOG_MESSAGE_FLUSH_INTERVAL (1 second if not set) has passed.
+
+    log_messages_created is sent with every written batch, as bulk_create does not
+    send post_save. Databases where bulk_create does not set pks have them read
+    back first.
+    """
+
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.pending = []
+        self.queued = 0
+        self.written = 0
+        self.flush_requested = False
+        self.thread = None
+
+    def add(self, log_message):
+        with self.condition:
+            self.pending.append(log_message)
+            self.queued += 1
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(
+                    target=self.run, name="log-message-writer", daemon=True
+                )
+                self.thread.start()
+            elif len(self.pending) >= self.get_batch_size():
+                self.condition.notify_all()
+
+    def flush(self):
+        """
+        Returns when all messages added before the call are written.
+        """
+        with self.condition:
+            writer_running = self.thread is not None and self.thread.is_alive()
+            if writer_running and threading.current_thread() is not self.thread:
+                target = self.queued
+                self.flush_requested = True
+                self.condition.notify_all()
+                while self.written < target and self.thread.is_alive():
+                    self.condition.wait(1)
+                return
+
+            log_messages, self.pending = self.pending, []
+
+        self.write(log_messages)
+        with self.condition:
+            self.written += len(log_messages)
+            self.condition.notify_all()
+
+    def get_batch_size(self):
+        return getattr(settings, "LOG_MESSAGE_BATCH_SIZE", 100)
+
+    def run(self):
+        while True:
+            with self.condition:
+                deadline = time.monotonic() + getattr(
+                    settings, "LOG_MESSAGE_FLUSH_INTERVAL", 1.0
+                )
+                while not self.flush_requested and (
+                    len(self.pending) < self.get_batch_size()
+                ):
+                    timeout = deadline - time.monotonic()
+                    if timeout <= 0:
+                        break
+                    self.condition.wait(timeout)
+
+                log_messages, self.pending = self.pending, []
+                self.flush_requested = False
+
+            self.write(log_messages)
+
+            with self.condition:
+                self.written += len(log_messages)
+                self.condition.notify_all()
+
+    def write(self, log_messages):
+        if not log_messages:
+            return
+
+        close_old_connections()
+        try:
+            LogMessage.objects.bulk_create(log_messages)
+            if log_messages[0].pk is None:
+                self.read_pks(log_messages)
+        except Exception:
+            logger.exception(f"Failed to write {len(log_messages)} log messages")
+            return
+
+        log_messages_created.send(sender=LogMessage, log_messages=log_messages)
+
+    def read_pks(self, log_messages):
+        """
+        Sets the pks of just written log_messages from the newest matching rows.
+        """
+        unmatched = defaultdict(list)
+        for log_message in log_messages:
+            key = (log_message.log_id, log_message.datetime, log_message.msg)
+            unmatched[key].append(log_message)
+
+        remaining = len(log_messages)
+        rows = (
+            LogMessage.objects.filter(
+                log_id__in={log_message.log_id for log_message in log_messages},
+                datetime__gte=min(log_message.datetime for log_message in log_messages),
+            )
+            .order_by("-pk")
+            .values_list("pk", "log_id", "datetime", "msg")
+        )
+        for pk, log_id, datetime, msg in rows.iterator():
+            matches = unmatched.get((log_id, datetime, msg))
+            if not matches:
+                continue
+
+            matches.pop().pk = pk
+            remaining -= 1
+            if not remaining:
+                break
+
+
+log_message_writer = LogMessageWriter()
+atexit.register(log_message_writer.flush)
+
 
 class LogManager(models.Manager):
-    def start_chain(self, plugin, action, user=None):
+    def start_chain(self, plugin, action, user=None, buffered=None):
+        """
+        Creates a log and returns a LogChain to write to it.
+
+        The messages of a buffered chain are written by log_message_writer,
+        settings.LOG_CHAIN_BUFFERED sets the default.
+        """
         if plugin is not None:
             if not isinstance(plugin, Plugin):
                 plugin = plugin._plugin_obj
@@ -21,7 +174,12 @@ class LogManager(models.Manager):
             f"New log chain started for plugin:{plugin!r} user:{user!r} action:{action}"
         )
         log = self.create(user=user, action=action, plugin=plugin)
-        return LogChain(log)
+        captured_logs = getattr(_captured_logs, "logs", None)
+        if captured_logs is not None:
+            captured_logs.append(log)
+        if buffered is None:
+            buffered = getattr(settings, "LOG_CHAIN_BUFFERED", False)
+        return LogChain(log, buffered=buffered)
 
     def cleanup_hanging_chains(self):
         logger.debug("Clearing up hanging log chains")
@@ -71,7 +229,7 @@ class LogMessage(models.Model):
     log = models.ForeignKey(
         Log, db_index=True, on_delete=models.CASCADE, related_name="log_messages"
     )
-    datetime = models.DateTimeField(auto_now_add=True)
+    datetime = models.DateTimeField(default=now)
     msg = models.TextField(blank=True, default="")
 
     class Meta:
@@ -82,8 +240,23 @@ class LogMessage(models.Model):
 
 
 class LogChain:
-    def __init__(self, log):
+    """
+    Writes the progress and messages of a log.
+
+    Progress is saved at most every settings.LOG_PROGRESS_INTERVAL seconds
+    (1 if not set, None to turn off), or when it moved at least
+    settings.LOG_PROGRESS_STEP (not set by default). A progress update held
+    back by the interval is saved from a timer once the interval has passed,
+    and the last value is always saved when the chain finishes.
+    """
+
+    def __init__(self, log, buffered=False):
         self._log = log
+        self.buffered = buffered
+        self._saved_progress = log.progress
+        self._saved_at = None
+        self._save_lock = threading.Lock()
+        self._progress_timer = None
 
     def log(self, progress=None, msg=""):
         modified = False
@@ -97,18 +270,79 @@ class LogChain:
 
         if progress is not None and self._log.progress != progress:
             self._log.progress = progress
-            modified = True
+            if self._should_save_progress(progress):
+                modified = True
+            else:
+                self._schedule_progress_save()
 
         if modified:
-            self._log.save()
+            with self._save_lock:
+                self._log.save()
+                self._saved_progress = self._log.progress
+                self._saved_at = time.monotonic()
 
         if msg:
-            LogMessage.objects.create(log=self._log, msg=msg)
+            if self.buffered:
+                log_message_writer.add(LogMessage(log=self._log, msg=msg))
+            else:
+                LogMessage.objects.create(log=self._log, msg=msg)
+
+    def _should_save_progress(self, progress):
+        step = getattr(settings, "LOG_PROGRESS_STEP", None)
+        if step is not None and abs(progress - self._saved_progress) >= step:
+            return True
+
+        interval = getattr(settings, "LOG_PROGRESS_INTERVAL", 1.0)
+        if interval is None:
+            return False
+
+        return self._saved_at is None or time.monotonic() - self._saved_at >= interval
+
+    def _schedule_progress_save(self):
+        interval = getattr(settings, "LOG_PROGRESS_INTERVAL", 1.0)
+        if interval is None:
+            return
+
+        with self._save_lock:
+            if self._progress_timer is not None:
+                return
+
+            delay = 0.0
+            if self._saved_at is not None:
+                delay = max(interval - (time.monotonic() - self._saved_at), 0.0)
+            self._progress_timer = threading.Timer(delay, self._save_progress)
+            self._progress_timer.daemon = True
+            self._progress_timer.start()
+
+    def _save_progress(self):
+        try:
+            with self._save_lock:
+                self._progress_timer = None
+                if self._log.end_datetime is not None:
+                    return
+                if self._log.progress == self._saved_progress:
+                    return
+
+                self._log.save(update_fields=["progress"])
+                self._saved_progress = self._log.progress
+                self._saved_at = time.monotonic()
+        except Exception:
+            logger.exception(f"Failed to save progress of log {self._log.pk}")
+        finally:
+            connection.close()
 
     def finish_chain(self, status):
-        self._log.status = status
-        self._log.end_datetime = now()
-        self._log.save()
+        if self.buffered:
+            log_message_writer.flush()
+
+        with self._save_lock:
+            if self._progress_timer is not None:
+                self._progress_timer.cancel()
+                self._progress_timer = None
+
+            self._log.status = status
+            self._log.end_datetime = now()
+            self._log.save()
 
     def __enter__(self):
         return self
@@ -128,6 +362,7 @@ class LogNotificationComponent(ApplicationSession):
         ApplicationSession.__init__(self, config)
         post_save.connect(self.new_log, sender=Log)
         post_save.connect(self.new_log_message, sender=LogMessage)
+        log_messages_created.connect(self.new_log_messages, sender=LogMessage)
 
     def new_log(self, sender, instance, created, raw, *args, **kwargs):
         from ..views.log import LogSerializer
@@ -141,3 +376,12 @@ class LogNotificationComponent(ApplicationSession):
             f"{settings.WAMP_LOG_TOPIC}.{instance.log_id}",
             LogMessageSerializer(instance).data,
         )
+
+    def new_log_messages(self, sender, log_messages, **kwargs):
+        from ..views.log import LogMessageSerializer
+
+        for log_message in log_messages:
+            self.publish(
+                f"{settings.WAMP_LOG_TOPIC}.{log_message.log_id}",
+                LogMessageSerializer(log_message).data,
+            )
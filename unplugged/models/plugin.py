@@ -7,10 +7,12 @@ from django.conf import settings
 from django.contrib.auth.models import Permission
 from django.contrib.contenttypes.models import ContentType
 from django.db import models
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 from jsonfield import JSONField
 from marshmallow import INCLUDE
 
-from ..baseplugin import PluginBase
+from ..baseplugin import PluginBase, related_plugin_enum_cache
 from ..pluginhandler import pluginhandler
 from ..signals import plugin_loaded, plugin_unloaded
 
@@ -19,11 +21,13 @@ logger = logging.getLogger(__name__)
 
 class PluginCache:
     def __init__(self):
+        self.generation = 0
         self.clear()
 
     def clear(self):
         self.plugins = defaultdict(dict)
         self.plugins_list = []
+        self.generation += 1
 
     def __contains__(self, key):
         if isinstance(key, tuple):
@@ -46,10 +50,12 @@ class PluginCache:
     def add_plugin(self, plugin):
         self.plugins_list.append(plugin)
         self.plugins[plugin.plugin_type][plugin.name] = plugin
+        self.generation += 1
 
     def remove_plugin(self, plugin):
         self.plugins_list.remove(plugin)
         del self.plugins[plugin.plugin_type][plugin.name]
+        self.generation += 1
 
 
 PLUGIN_CACHE = PluginCache()
@@ -104,6 +110,15 @@ class PluginManager(models.Manager):
     def get_all_loaded_plugins(self):
         return PLUGIN_CACHE.plugins_list
 
+    def get_generation(self):
+        """
+        Returns a value that changes whenever a plugin row is created, changed or deleted.
+        """
+        result = self.model.objects.aggregate(
+            count=models.Count("pk"), last_update=models.Max("last_update")
+        )
+        return (result["count"], result["last_update"])
+
     def get_plugin_by_name(self, plugin_type, name):
         plugin = self.model.objects.get(plugin_type=plugin_type, name=name)
         return self.get_plugin(plugin.pk)
@@ -271,3 +286,12 @@ class Plugin(models.Model):  # TODO: ensure plugin unload / reload is good
 
     def __str__(self):
         return f"{self.name} using {self.plugin_type}"
+
+
+@receiver(post_save, sender=Plugin, dispatch_uid="plugin_saved_enum_cache")
+@receiver(post_delete, sender=Plugin, dispatch_uid="plugin_deleted_enum_cache")
+@receiver(plugin_loaded, dispatch_uid="plugin_loaded_enum_cache")
+@receiver(plugin_unloaded, dispatch_uid="plugin_unloaded_enum_cache")
+def invalidate_related_plugin_enums(sender, **kwargs):
+    plugin = kwargs.get("instance") or kwargs["plugin"]
+    related_plugin_enum_cache.invalidate(plugin.plugin_type, plugin.plugin_name)
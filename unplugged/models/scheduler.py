@@ -1,10 +1,17 @@
 import re
+import zlib
+from datetime import timedelta
+from functools import lru_cache
 
+from apscheduler.triggers.base import BaseTrigger
 from apscheduler.triggers.cron import CronTrigger
 from apscheduler.triggers.interval import IntervalTrigger
-from django.db import models
+from django.conf import settings
+from django.db import models, transaction
 from jsonfield import JSONField
 
+from ..signals import schedules_changed
+from .log import Log
 from .plugin import Plugin
 
 
@@ -12,7 +19,12 @@ class FailedToParseScheduleException(Exception):
     pass
 
 
-def parse_schedule_trigger(method, config):
+@lru_cache(maxsize=1024)
+def _parse_schedule_trigger(method, config):
+    """
+    Returns a CronTrigger, which can be shared, or the kwargs of an IntervalTrigger,
+    which counts from when it is created and is built for every caller.
+    """
     config = re.split(r" +", config)
     if method == "cron":
         fields = [
@@ -46,14 +58,64 @@ def parse_schedule_trigger(method, config):
             )
 
         try:
-            return IntervalTrigger(**kwargs)
+            IntervalTrigger(**kwargs)
         except ValueError as e:
             raise FailedToParseScheduleException(*e.args)
 
+        return kwargs
+
     else:
         raise FailedToParseScheduleException(f"Unknown method: {method}")
 
 
+def parse_schedule_trigger(method, config):
+    """
+    Returns the trigger of a schedule, parsing each (method, config) only once.
+    """
+    trigger = _parse_schedule_trigger(method, config)
+    if isinstance(trigger, dict):
+        return IntervalTrigger(**trigger)
+    return trigger
+
+
+def get_schedule_offset(pk, window):
+    """
+    Returns a number of seconds between 0 and window picked from the schedule pk,
+    the same in every process and across restarts.
+    """
+    return zlib.crc32(f"schedule:{pk}".encode()) % (window + 1)
+
+
+class OffsetTrigger(BaseTrigger):
+    """
+    Fires offset seconds after every fire time of trigger.
+    """
+
+    __slots__ = ("trigger", "offset")
+
+    def __init__(self, trigger, offset):
+        self.trigger = trigger
+        self.offset = timedelta(seconds=offset)
+
+    def get_next_fire_time(self, previous_fire_time, now):
+        if previous_fire_time is not None:
+            previous_fire_time -= self.offset
+
+        next_fire_time = self.trigger.get_next_fire_time(
+            previous_fire_time, now - self.offset
+        )
+        if next_fire_time is None:
+            return None
+
+        return next_fire_time + self.offset
+
+    def __str__(self):
+        return f"{self.trigger} offset by {self.offset.total_seconds():g}s"
+
+    def __repr__(self):
+        return f"<OffsetTrigger ({self.trigger!r}, offset={self.offset!r})>"
+
+
 class ScheduleManager(models.Manager):
     def ensure_schedule(
         self, method, method_config, command, kwargs, plugin, plugin_unique_id
@@ -100,6 +162,104 @@ class ScheduleManager(models.Manager):
                 plugin_unique_id=plugin_unique_id,
             )
 
+    def ensure_schedules(self, plugin, specs, disable_missing=True):
+        """
+        Makes the schedules of a plugin match specs, a list of dicts with
+        plugin_unique_id, method, method_config, command and kwargs.
+
+        Existing schedules are read with one query and all changes are saved in
+        one transaction. Schedules not in specs are disabled if disable_missing is set,
+        schedules without a plugin_unique_id, e.g. created by an admin, are left alone.
+        schedules_changed is sent with the changed schedules when the transaction commits.
+        """
+        if not isinstance(plugin, Plugin):
+            plugin = plugin._plugin_obj
+
+        existing_schedules = {
+            schedule.plugin_unique_id: schedule
+            for schedule in self.filter(plugin=plugin, plugin_unique_id__isnull=False)
+        }
+
+        updated_schedules = []
+        created_schedules = []
+        for spec in specs:
+            values = {
+                "method": spec["method"],
+                "method_config": spec["method_config"],
+                "command": spec["command"],
+                "kwargs": spec.get("kwargs", {}),
+                "enabled": True,
+            }
+            schedule = existing_schedules.pop(spec["plugin_unique_id"], None)
+            if schedule is None:
+                created_schedules.append(
+                    self.model(
+                        plugin=plugin,
+                        plugin_unique_id=spec["plugin_unique_id"],
+                        **values,
+                    )
+                )
+                continue
+
+            changed = False
+            for key, value in values.items():
+                if getattr(schedule, key) != value:
+                    setattr(schedule, key, value)
+                    changed = True
+
+            if changed:
+                schedule.version += 1
+                updated_schedules.append(schedule)
+
+        if disable_missing:
+            for schedule in existing_schedules.values():
+                if schedule.enabled:
+                    schedule.enabled = False
+                    schedule.version += 1
+                    updated_schedules.append(schedule)
+
+        if not created_schedules and not updated_schedules:
+            return []
+
+        with transaction.atomic():
+            if updated_schedules:
+                self.bulk_update(
+                    updated_schedules,
+                    [
+                        "method",
+                        "method_config",
+                        "command",
+                        "kwargs",
+                        "enabled",
+                        "version",
+                    ],
+                )
+
+            if created_schedules:
+                self.bulk_create(created_schedules)
+                if created_schedules[0].pk is None:
+                    created_schedules = list(
+                        self.filter(
+                            plugin=plugin,
+                            plugin_unique_id__in=[
+                                schedule.plugin_unique_id
+                                for schedule in created_schedules
+                            ],
+                        )
+                    )
+
+            changed_schedules = updated_schedules + created_schedules
+            for schedule in changed_schedules:
+                schedule.plugin = plugin
+
+            transaction.on_commit(
+                lambda: schedules_changed.send(
+                    sender=self.model, plugin=plugin, schedules=changed_schedules
+                )
+            )
+
+        return changed_schedules
+
 
 class Schedule(models.Model):
     METHOD_CRON = "cron"
@@ -119,7 +279,125 @@ class Schedule(models.Model):
 
     enabled = models.BooleanField(default=False)
 
+    max_instances = models.PositiveIntegerField(null=True, blank=True)
+    coalesce = models.BooleanField(null=True, blank=True)
+    misfire_grace_time = models.PositiveIntegerField(null=True, blank=True)
+    jitter = models.PositiveIntegerField(null=True, blank=True)
+
+    version = models.PositiveIntegerField(default=0)
+
     objects = ScheduleManager()
 
+    def save(self, *args, **kwargs):
+        """
+        Bumps the version so processes running an older copy of this schedule
+        notice it changed.
+        """
+        self.version += 1
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "version" not in update_fields:
+            kwargs["update_fields"] = list(update_fields) + ["version"]
+        super().save(*args, **kwargs)
+
     def get_trigger(self):
-        return parse_schedule_trigger(self.method, self.method_config)
+        trigger = parse_schedule_trigger(self.method, self.method_config)
+        offset = self.get_offset()
+        if offset:
+            trigger = OffsetTrigger(trigger, offset)
+        return trigger
+
+    def get_offset(self):
+        """
+        Returns the seconds this schedule fires after its trigger.
+
+        The offset is up to jitter seconds. Cron schedules without a jitter are
+        spread over settings.SCHEDULE_SPREAD_WINDOW seconds, if set, so schedules
+        sharing a fire time do not all fire on the same second. A jitter of 0
+        turns this off.
+        """
+        window = self.jitter
+        if window is None and self.method == self.METHOD_CRON:
+            window = getattr(settings, "SCHEDULE_SPREAD_WINDOW", 0)
+
+        if not window or self.pk is None:
+            return 0
+
+        return get_schedule_offset(self.pk, window)
+
+    def get_job_options(self):
+        """
+        Returns the options APScheduler should run this schedule with,
+        the job defaults of the scheduler are used for options that are not set.
+        """
+        options = {}
+        for option in ("max_instances", "coalesce", "misfire_grace_time"):
+            value = getattr(self, option)
+            if value is not None:
+                options[option] = value
+        return options
+
+
+class ScheduleRunManager(models.Manager):
+    def trim(self, schedule_id, keep, batch_size=500):
+        """
+        Deletes all but the newest keep runs of a schedule, batch_size rows at a time.
+        """
+        cutoff = list(
+            self.filter(schedule_id=schedule_id)
+            .order_by("-pk")
+            .values_list("pk", flat=True)[keep : keep + 1]
+        )
+        if not cutoff:
+            return 0
+
+        deleted = 0
+        while True:
+            pks = list(
+                self.filter(schedule_id=schedule_id, pk__lte=cutoff[0]).values_list(
+                    "pk", flat=True
+                )[:batch_size]
+            )
+            if not pks:
+                break
+            deleted += self.filter(pk__in=pks).delete()[0]
+
+        return deleted
+
+
+class ScheduleRun(models.Model):
+    STATUS_SUCCESS = "success"
+    STATUS_FAILED = "failed"
+
+    schedule = models.ForeignKey(
+        Schedule, on_delete=models.CASCADE, related_name="runs"
+    )
+    planned_datetime = models.DateTimeField(null=True)
+    start_datetime = models.DateTimeField()
+    duration = models.FloatField()
+    status = models.CharField(
+        max_length=10,
+        choices=((STATUS_SUCCESS, "Success"), (STATUS_FAILED, "Failed")),
+    )
+    log = models.ForeignKey(Log, null=True, on_delete=models.SET_NULL)
+
+    objects = ScheduleRunManager()
+
+    class Meta:
+        ordering = ("-pk",)
+
+    def get_lag(self):
+        if self.planned_datetime is None:
+            return None
+        return (self.start_datetime - self.planned_datetime).total_seconds()
+
+
+class ScheduleLease(models.Model):
+    """
+    Marks which process fires a schedule when several processes run the scheduler.
+    """
+
+    schedule = models.OneToOneField(
+        Schedule, on_delete=models.CASCADE, primary_key=True, related_name="lease"
+    )
+    owner = models.CharField(max_length=200, db_index=True)
+    expires = models.DateTimeField(db_index=True)
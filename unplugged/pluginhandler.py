@@ -3,6 +3,7 @@ Coordinates plugins and handles the register
 """
 
 import logging
+from collections import defaultdict
 
 logger = logging.getLogger(__name__)
 
@@ -19,6 +20,10 @@ class PluginHandler:
     def __init__(self):
         self.plugin_types = {}
         self.plugins = {}
+        self.traits = {}  # plugin_type mapped to trait mapped to plugin classes
+        self.sorted_plugins = {}  # plugin_type mapped to plugin classes by priority
+        self.all_plugins = ()
+        self.version = 0  # bumped on every change to the registered plugins
 
     def register_plugin_type(self, plugin_interface):
         """
@@ -32,6 +37,8 @@ class PluginHandler:
         logger.info("Registering plugin type: %r" % (plugin_type,))
         self.plugin_types[plugin_type] = plugin_interface
         self.plugins[plugin_type] = {}
+        self.traits[plugin_type] = defaultdict(set)
+        self._sort_plugins(plugin_type)
 
     def register_plugin(self, cls):
         """
@@ -55,19 +62,44 @@ class PluginHandler:
 
         if name in self.plugins[plugin_type]:
             logger.warning(f"Double registering plugin {name} of type {plugin_type}")
+            old_cls = self.plugins[plugin_type][name]
+            for trait in old_cls.__traits__:
+                self.traits[plugin_type][trait].discard(old_cls)
 
         logger.info(f"Registering plugin {name} of type {plugin_type}")
         self.plugins[plugin_type][name] = cls
+        for trait in cls.__traits__:
+            self.traits[plugin_type][trait].add(cls)
+        self._sort_plugins(plugin_type)
+
+    def _sort_plugins(self, plugin_type):
+        """
+        Rebuilds the sorted plugins after plugin_type has changed.
+        """
+        self.sorted_plugins[plugin_type] = tuple(
+            sorted(
+                self.plugins[plugin_type].values(),
+                key=lambda x: getattr(x, "priority", 0),
+            )
+        )
+        self.all_plugins = tuple(
+            plugin
+            for plugin_type in self.plugins.keys()
+            for plugin in self.sorted_plugins[plugin_type]
+        )
+        self.version += 1
 
     def get_all_plugins(self):
-        for plugin_type in self.plugins.keys():
-            for plugin in self.get_plugins(plugin_type):
-                yield plugin
+        """
+        Returns all plugins, grouped by plugin type and sorted by priority.
+        """
+        return self.all_plugins
 
     def get_plugins(self, plugin_type):
-        return sorted(
-            self.plugins[plugin_type].values(), key=lambda x: getattr(x, "priority", 0)
-        )
+        """
+        Returns the plugins of plugin_type sorted by priority.
+        """
+        return self.sorted_plugins[plugin_type]
 
     def get_plugin_names(self, plugin_type):
         return self.plugins[plugin_type].keys()
@@ -75,6 +107,16 @@ class PluginHandler:
     def get_plugin(self, plugin_type, name):
         return self.plugins[plugin_type].get(name)
 
+    def get_plugins_with_traits(self, plugin_type, traits):
+        """
+        Returns the set of plugin classes of plugin_type that have all the traits.
+        """
+        if not traits:
+            return set(self.plugins[plugin_type].values())
+
+        index = self.traits[plugin_type]
+        return set.intersection(*[index.get(trait, set()) for trait in traits])
+
     def get_plugin_type(self, plugin_type):
         return self.plugins[plugin_type]
 
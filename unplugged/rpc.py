@@ -0,0 +1,155 @@
+import logging
+from collections.abc import Iterator
+
+from autobahn.twisted.wamp import ApplicationSession
+from autobahn.wamp.exception import ApplicationError
+from django.http import HttpResponse
+from twisted.internet import threads
+
+from .jsonapi import JSONAPIObject, JSONAPIRoot
+from .models import Plugin
+from .models.plugin import PLUGIN_CACHE
+from .schema import ValidationError
+from .signals import plugin_loaded, plugin_unloaded
+
+logger = logging.getLogger(__name__)
+
+
+def get_command_uri(plugin_type, name, command_name):
+    return f"plugin.{plugin_type}.{name}.command.{command_name}"
+
+
+class CommandRPCComponent(ApplicationSession):
+    """
+    Exposes plugin commands as WAMP procedures, letting clients that already
+    hold a WAMP session call commands without going through HTTP.
+
+    Access is guarded by the WAMP service guard, arguments are validated with
+    the same parse_kwargs as the HTTP command view.
+    """
+
+    def __init__(self, config=None):
+        ApplicationSession.__init__(self, config)
+        self._registrations = {}
+
+    def onJoin(self, details):
+        for plugin in Plugin.objects.get_all_loaded_plugins():
+            self.register_plugin_commands(plugin)
+
+        plugin_loaded.connect(self.plugin_loaded)
+        plugin_unloaded.connect(self.plugin_unloaded)
+
+    def onLeave(self, details):
+        plugin_loaded.disconnect(self.plugin_loaded)
+        plugin_unloaded.disconnect(self.plugin_unloaded)
+        ApplicationSession.onLeave(self, details)
+
+    def plugin_loaded(self, sender, plugin, **kwargs):
+        self.register_plugin_commands(plugin.get_plugin())
+
+    def plugin_unloaded(self, sender, plugin, **kwargs):
+        self.unregister_plugin_commands(plugin.plugin_type, plugin.name)
+
+    def register_plugin_commands(self, plugin):
+        for command_name in plugin.__commands__ or {}:
+            uri = get_command_uri(plugin.plugin_type, plugin.name, command_name)
+            if uri in self._registrations:
+                continue
+
+            logger.debug(f"Registering command RPC {uri}")
+
+            def endpoint(
+                *args,
+                plugin_type=plugin.plugin_type,
+                name=plugin.name,
+                command_name=command_name,
+                **kwargs,
+            ):
+                if args:
+                    raise ApplicationError(
+                        "unplugged.error.invalid_args",
+                        "Commands only take keyword arguments",
+                    )
+
+                return threads.deferToThread(
+                    self.call_command, plugin_type, name, command_name, kwargs
+                )
+
+            self._registrations[uri] = self.register(endpoint, uri)
+
+    def unregister_plugin_commands(self, plugin_type, name):
+        prefix = get_command_uri(plugin_type, name, "")
+        for uri in [uri for uri in self._registrations if uri.startswith(prefix)]:
+            logger.debug(f"Unregistering command RPC {uri}")
+            self._registrations.pop(uri).addCallback(
+                lambda registration: registration.unregister()
+            )
+
+    def call_command(self, plugin_type, name, command_name, kwargs):
+        if (plugin_type, name) not in PLUGIN_CACHE:
+            raise ApplicationError(
+                "unplugged.error.unknown_plugin", f"{plugin_type}/{name} is not loaded"
+            )
+
+        plugin = PLUGIN_CACHE.get_plugin_by_keys(plugin_type, name)
+        command = plugin.get_command(command_name)
+        if not command:
+            raise ApplicationError(
+                "unplugged.error.unknown_command",
+                f"{command_name} is not a known command",
+            )
+
+        if command.need_request:
+            raise ApplicationError(
+                "unplugged.error.unsupported_command",
+                f"{command_name} requires an HTTP request",
+            )
+
+        try:
+            kwargs = command.parse_kwargs(kwargs)
+        except ValidationError as err:
+            raise ApplicationError(
+                "unplugged.error.invalid_args",
+                f"You provided invalid arguments to the function {command}",
+                errors=err.messages,
+            )
+
+        kwargs["self"] = plugin
+
+        try:
+            command_result = command.execute(kwargs)
+            if isinstance(command_result, Iterator):
+                command_result = self.collect_iterator_result(command_result)
+        except Exception:
+            logger.exception(f"Failed to execute {command} with args {kwargs}")
+            raise ApplicationError(
+                "unplugged.error.execution_failed", "Failed to execute command"
+            )
+
+        if isinstance(command_result, HttpResponse):
+            raise ApplicationError(
+                "unplugged.error.unsupported_result",
+                f"{command_name} returned a result that cannot be sent over RPC",
+            )
+
+        if isinstance(command_result, JSONAPIRoot):
+            return command_result.serialize(None)
+
+        return JSONAPIRoot.success_status(command_result).serialize(None)
+
+    def collect_iterator_result(self, command_result):
+        """
+        Consumes an iterator result. JSONAPIObjects are returned in a JSONAPIRoot,
+        anything else as a list that is wrapped like any other result.
+        """
+        items = list(command_result)
+        if all(isinstance(item, JSONAPIObject) for item in items):
+            jsonapi_root = JSONAPIRoot()
+            for item in items:
+                jsonapi_root.append(item)
+            return jsonapi_root
+
+        return [
+            item.serialize(None) if isinstance(item, JSONAPIObject) else item
+            for item in items
+        ]
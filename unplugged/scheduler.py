@@ -1,40 +1,448 @@
 import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from bisect import bisect_left
+from collections import defaultdict, deque
+from datetime import datetime, timedelta
 
+from apscheduler.events import EVENT_JOB_MISSED
+from apscheduler.executors.base import MaxInstancesReachedError
+from apscheduler.executors.pool import ThreadPoolExecutor
 from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Q
 from django.db.models.signals import post_delete, post_save
+from django.utils.timezone import now
 
-from .models import Schedule
-from .signals import plugin_loaded, plugin_unloaded
+from .metrics import DEFAULT_BUCKETS, bucket_quantile, schedule_metrics
+from .models import Schedule, ScheduleLease, ScheduleRun, capture_log_chains
+from .signals import plugin_loaded, plugin_unloaded, schedules_changed
 
 logger = logging.getLogger(__name__)
 
 
+class CompiledSchedule:
+    """
+    What is needed to fire a schedule without touching the database.
+
+    kwargs are kept as stored and parsed again for every run, as parsed kwargs
+    can hold plugins and model objects that change or must not be shared by runs.
+    """
+
+    __slots__ = ("plugin", "command", "command_name", "kwargs")
+
+    def __init__(self, plugin, command, command_name, kwargs):
+        self.plugin = plugin
+        self.command = command
+        self.command_name = command_name
+        self.kwargs = kwargs
+
+
+class ScheduleStats:
+    """
+    Queue depth and start lag of the schedules of one plugin.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.queued = 0
+        self.running = 0
+        self.runs = 0
+        self.skipped = 0
+        self.missed = 0
+        self.lag_total = 0.0
+        self.lag_max = 0.0
+        self.lag_last = 0.0
+        self.pending_run_times = defaultdict(deque)  # schedule pk mapped to run times
+
+    def job_submitted(self, pk, run_times):
+        with self.lock:
+            self.queued += len(run_times)
+            self.pending_run_times[pk].extend(run_times)
+
+    def job_rejected(self, pk, run_times):
+        with self.lock:
+            self.queued -= len(run_times)
+            self.skipped += 1
+            for _ in run_times:
+                self.pending_run_times[pk].pop()
+
+    def job_missed(self, pk, run_time):
+        with self.lock:
+            self.missed += 1
+            try:
+                self.pending_run_times[pk].remove(run_time)
+            except ValueError:
+                pass
+            else:
+                self.queued -= 1
+
+    def job_started(self, pk):
+        """
+        Returns the time the run was planned for, if known.
+        """
+        with self.lock:
+            self.running += 1
+            run_times = self.pending_run_times[pk]
+            if not run_times:
+                return None
+
+            run_time = run_times.popleft()
+            lag = (datetime.now(run_time.tzinfo) - run_time).total_seconds()
+            self.queued -= 1
+            self.lag_total += lag
+            self.lag_max = max(self.lag_max, lag)
+            self.lag_last = lag
+            return run_time
+
+    def job_finished(self):
+        with self.lock:
+            self.running -= 1
+            self.runs += 1
+
+    def serialize(self):
+        with self.lock:
+            return {
+                "queued": self.queued,
+                "running": self.running,
+                "runs": self.runs,
+                "skipped": self.skipped,
+                "missed": self.missed,
+                "lag_last": self.lag_last,
+                "lag_max": self.lag_max,
+                "lag_average": self.lag_total / self.runs if self.runs else 0.0,
+            }
+
+
+class ScheduleRunRollup:
+    """
+    Duration and lag histograms and failure rate of the runs of one schedule.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.lock = threading.Lock()
+        self.buckets = buckets
+        self.runs = 0
+        self.failures = 0
+        self.durations = [0] * (len(buckets) + 1)
+        self.lags = [0] * (len(buckets) + 1)
+        self.duration_total = 0.0
+        self.lag_total = 0.0
+        self.lag_count = 0
+
+    def add(self, duration, lag, failed):
+        with self.lock:
+            self.runs += 1
+            if failed:
+                self.failures += 1
+            self.durations[bisect_left(self.buckets, duration)] += 1
+            self.duration_total += duration
+            if lag is not None:
+                self.lags[bisect_left(self.buckets, max(lag, 0.0))] += 1
+                self.lag_total += lag
+                self.lag_count += 1
+
+    def serialize(self):
+        with self.lock:
+            durations, lags = list(self.durations), list(self.lags)
+            runs, failures = self.runs, self.failures
+            duration_total, lag_total, lag_count = (
+                self.duration_total,
+                self.lag_total,
+                self.lag_count,
+            )
+
+        return {
+            "runs": runs,
+            "failures": failures,
+            "failure_rate": failures / runs if runs else 0.0,
+            "duration_average": duration_total / runs if runs else None,
+            "duration_p50": bucket_quantile(self.buckets, durations, 0.5),
+            "duration_p95": bucket_quantile(self.buckets, durations, 0.95),
+            "lag_average": lag_total / lag_count if lag_count else None,
+            "lag_p50": bucket_quantile(self.buckets, lags, 0.5),
+            "lag_p95": bucket_quantile(self.buckets, lags, 0.95),
+        }
+
+
+class ScheduleExecutor(ThreadPoolExecutor):
+    """
+    A worker pool for the schedules of one plugin, keeping track of queued runs.
+    """
+
+    def __init__(self, max_workers, stats):
+        super().__init__(max_workers)
+        self.stats = stats
+
+    def submit_job(self, job, run_times):
+        pk = job.kwargs["pk"]
+        self.stats.job_submitted(pk, run_times)
+        try:
+            super().submit_job(job, run_times)
+        except MaxInstancesReachedError:
+            self.stats.job_rejected(pk, run_times)
+            raise
+
+
+class ScheduleLeases:
+    """
+    Database leases making sure only one process fires a schedule. A lease is taken
+    when a schedule fires and is kept alive by renew() until the process stops.
+    Expired leases can be taken over by any process.
+
+    A lease is only taken while the schedule is enabled and at the version the
+    process loaded, so a process holding an outdated schedule stops firing it.
+    """
+
+    def __init__(self, ttl):
+        self.ttl = timedelta(seconds=ttl)
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+    def acquire(self, pk, version=None):
+        """
+        Returns True if this process owns the lease of schedule pk, an enabled
+        schedule at version. Any version is accepted if version is None.
+        """
+        current_time = now()
+        expires = current_time + self.ttl
+        leases = ScheduleLease.objects.filter(schedule_id=pk, schedule__enabled=True)
+        schedules = Schedule.objects.filter(pk=pk, enabled=True)
+        if version is not None:
+            leases = leases.filter(schedule__version=version)
+            schedules = schedules.filter(version=version)
+
+        if leases.filter(Q(owner=self.owner) | Q(expires__lt=current_time)).update(
+            owner=self.owner, expires=expires
+        ):
+            return True
+
+        if ScheduleLease.objects.filter(schedule_id=pk).exists():
+            return False
+
+        if not schedules.exists():
+            return False
+
+        try:
+            with transaction.atomic():
+                ScheduleLease.objects.create(
+                    schedule_id=pk, owner=self.owner, expires=expires
+                )
+        except IntegrityError:
+            return False
+        return True
+
+    def renew(self):
+        ScheduleLease.objects.filter(owner=self.owner).update(expires=now() + self.ttl)
+
+    def release(self, pks=None):
+        leases = ScheduleLease.objects.filter(owner=self.owner)
+        if pks is not None:
+            leases = leases.filter(schedule_id__in=pks)
+        leases.delete()
+
+
+def project_firing_density(schedules, start, minutes):
+    """
+    Returns how often schedules fire in every minute from start, with the most
+    fires in a single second of that minute.
+    """
+    end = start + timedelta(minutes=minutes)
+    minute_fires = defaultdict(int)
+    second_fires = defaultdict(int)
+
+    for schedule in schedules:
+        try:
+            trigger = schedule.get_trigger()
+        except Exception:
+            logger.exception(f"Failed to parse schedule {schedule}")
+            continue
+
+        fire_time = trigger.get_next_fire_time(None, start)
+        while fire_time is not None and fire_time < end:
+            second = fire_time.replace(microsecond=0)
+            second_fires[second] += 1
+            minute_fires[second.replace(second=0)] += 1
+            fire_time = trigger.get_next_fire_time(fire_time, fire_time)
+
+    peak_seconds = defaultdict(int)
+    for second, fires in second_fires.items():
+        minute = second.replace(second=0)
+        peak_seconds[minute] = max(peak_seconds[minute], fires)
+
+    first_minute = start.replace(second=0, microsecond=0)
+    density = []
+    for i in range(minutes):
+        minute = first_minute + timedelta(minutes=i)
+        density.append(
+            {
+                "minute": minute.isoformat(),
+                "fires": minute_fires[minute],
+                "peak_second": peak_seconds[minute],
+            }
+        )
+
+    return density
+
+
 class ScheduleManager:
+    """
+    Runs enabled schedules of loaded plugins with settings.SCHEDULER.
+
+    Every plugin gets its own worker pool with settings.SCHEDULER_PLUGIN_WORKERS
+    threads, two if not set, so slow schedules cannot starve other plugins.
+
+    Runs are recorded as ScheduleRun, keeping the newest
+    settings.SCHEDULE_RUN_HISTORY (100 if not set) per schedule.
+
+    If several processes run the scheduler, set settings.SCHEDULE_LEASE_TTL to
+    a number of seconds to let only one process fire each schedule.
+    """
+
+    trim_interval = 50  # runs of a schedule between trimming its history
+
     def __init__(self):
         self.schedules = {}
+        self.compiled_schedules = {}  # schedule pk mapped to CompiledSchedule
+        self.executors = {}  # plugin pk mapped to ScheduleExecutor
+        self.schedule_plugins = {}  # schedule pk mapped to plugin pk
+        self.schedule_versions = {}  # schedule pk mapped to loaded version
+        self.runs_since_trim = defaultdict(int)  # schedule pk mapped to run count
+        self.prefetched_schedules = None  # plugin pk mapped to schedules by pk
+        self.leases = None
+        self.trim_lock = threading.Lock()
+
+    def prefetch_schedules(self):
+        """
+        Fetches all enabled schedules in one query, handing them out as plugins
+        are loaded until clear_prefetched_schedules is called.
+        """
+        self.prefetched_schedules = defaultdict(dict)
+        for schedule in Schedule.objects.filter(enabled=True).select_related("plugin"):
+            self.prefetched_schedules[schedule.plugin_id][schedule.pk] = schedule
+
+    def clear_prefetched_schedules(self):
+        self.prefetched_schedules = None
 
     def plugin_loaded(self, sender, plugin, **kwargs):
         logger.debug(f"Creating schedules for {plugin}")
-        for schedule in Schedule.objects.filter(plugin=plugin, enabled=True):
+        if self.prefetched_schedules is not None:
+            schedules = self.prefetched_schedules.pop(plugin.pk, {}).values()
+        else:
+            schedules = Schedule.objects.filter(plugin=plugin, enabled=True)
+
+        for schedule in schedules:
+            schedule.plugin = plugin
             self.reload_schedule(schedule)
 
     def plugin_unloaded(self, sender, plugin, **kwargs):
         logger.debug(f"Removing schedules for {plugin}")
-        for schedule in Schedule.objects.filter(plugin=plugin, enabled=True):
-            self.unload_schedule(schedule)
+        pks = list(self.schedules.get(plugin.pk, {}).keys())
+        for pk in pks:
+            self.remove_job(plugin.pk, pk)
+        self.remove_executor(plugin.pk)
+        if self.leases and pks:
+            self.leases.release(pks)
+
+    def get_executor_alias(self, plugin_pk):
+        return f"plugin_{plugin_pk}"
+
+    def get_executor(self, plugin_pk):
+        """
+        Returns the alias of the worker pool of a plugin, creating it if needed.
+        """
+        alias = self.get_executor_alias(plugin_pk)
+        if plugin_pk not in self.executors:
+            logger.debug(f"Adding executor {alias}")
+            max_workers = getattr(settings, "SCHEDULER_PLUGIN_WORKERS", 2)
+            executor = ScheduleExecutor(max_workers, ScheduleStats())
+            settings.SCHEDULER.add_executor(executor, alias)
+            self.executors[plugin_pk] = executor
+        return alias
+
+    def remove_executor(self, plugin_pk):
+        """
+        Removes the worker pool of a plugin, runs in progress are allowed to finish.
+        """
+        executor = self.executors.pop(plugin_pk, None)
+        if executor is None:
+            return
+
+        alias = self.get_executor_alias(plugin_pk)
+        logger.debug(f"Removing executor {alias}")
+        settings.SCHEDULER.remove_executor(alias, shutdown=False)
+        executor.shutdown(wait=False)
+
+    def get_plugin_stats(self, plugin_pk):
+        executor = self.executors.get(plugin_pk)
+        if executor is None:
+            return None
+        return executor.stats
+
+    def get_stats(self):
+        """
+        Returns queue depth and lag of the scheduled runs per plugin pk.
+        """
+        return {
+            plugin_pk: executor.stats.serialize()
+            for plugin_pk, executor in list(self.executors.items())
+        }
+
+    def job_missed(self, event):
+        pk = self.get_schedule_pk(event.job_id)
+        stats = self.get_plugin_stats(self.schedule_plugins.get(pk))
+        if stats:
+            stats.job_missed(pk, event.scheduled_run_time)
+
+    def get_job_id(self, pk):
+        return f"scheduler_{pk}"
+
+    def get_schedule_pk(self, job_id):
+        if not job_id.startswith("scheduler_"):
+            return None
+        return int(job_id[10:])
 
     def unload_schedule(self, schedule):
         logger.debug(f"Unloading schedule {schedule}")
-        schedules = self.schedules.setdefault(schedule.plugin.pk, {})
-        job = schedules.pop(schedule.pk, None)
+        self.remove_job(schedule.plugin_id, schedule.pk)
+
+    def remove_job(self, plugin_pk, pk):
+        schedules = self.schedules.setdefault(plugin_pk, {})
+        job = schedules.pop(pk, None)
+        self.compiled_schedules.pop(pk, None)
+        self.schedule_plugins.pop(pk, None)
+        self.schedule_versions.pop(pk, None)
         if job:
             job.remove()
 
+    def update_prefetched_schedule(self, schedule):
+        if self.prefetched_schedules is None:
+            return
+
+        prefetched = self.prefetched_schedules.get(schedule.plugin_id)
+        if prefetched is not None:
+            prefetched.pop(schedule.pk, None)
+            if schedule.enabled:
+                prefetched[schedule.pk] = schedule
+
     def schedule_modified(self, sender, instance, created, **kwargs):
+        self.update_prefetched_schedule(instance)
         self.reload_schedule(instance)
 
+    def schedules_changed(self, sender, plugin, schedules, **kwargs):
+        for schedule in schedules:
+            self.update_prefetched_schedule(schedule)
+            self.reload_schedule(schedule)
+
     def schedule_deleted(self, sender, instance, **kwargs):
+        if self.prefetched_schedules is not None:
+            self.prefetched_schedules.get(instance.plugin_id, {}).pop(instance.pk, None)
+
         self.unload_schedule(instance)
+        with self.trim_lock:
+            self.runs_since_trim.pop(instance.pk, None)
 
     def load_schedule(self, schedule):
         logger.debug(f"Loading schedule {schedule}")
@@ -42,11 +450,38 @@ class ScheduleManager:
         job = settings.SCHEDULER.add_job(
             self.trigger_schedule,
             schedule.get_trigger(),
-            id=f"scheduler_{schedule.pk}",
+            id=self.get_job_id(schedule.pk),
             kwargs={"pk": schedule.pk},
+            executor=self.get_executor(schedule.plugin_id),
+            **schedule.get_job_options(),
         )
-        schedules = self.schedules.setdefault(schedule.plugin.pk, {})
+        schedules = self.schedules.setdefault(schedule.plugin_id, {})
         schedules[schedule.pk] = job
+        self.schedule_plugins[schedule.pk] = schedule.plugin_id
+        self.schedule_versions[schedule.pk] = schedule.version
+
+        if schedule.plugin.is_plugin_loaded():
+            try:
+                self.compile_schedule(schedule)
+            except Exception:
+                logger.exception(f"Failed to compile schedule {schedule}")
+
+    def compile_schedule(self, schedule):
+        """
+        Resolves plugin and command of a schedule and validates its kwargs,
+        loading the plugin if needed.
+        """
+        plugin = schedule.plugin.get_plugin()
+        command = plugin.get_command(schedule.command)
+        if command is None:
+            raise ValueError(f"{schedule.command} is not a known command")
+
+        kwargs = schedule.kwargs or {}
+        command.parse_kwargs(kwargs)
+
+        compiled_schedule = CompiledSchedule(plugin, command, schedule.command, kwargs)
+        self.compiled_schedules[schedule.pk] = compiled_schedule
+        return compiled_schedule
 
     def reload_schedule(self, schedule):
         self.unload_schedule(schedule)
@@ -55,31 +490,165 @@ class ScheduleManager:
 
         self.load_schedule(schedule)
 
+    def refresh_schedule(self, pk):
+        """
+        Reloads schedule pk if it was changed, disabled or deleted since it was
+        loaded, e.g. by another process.
+        """
+        if pk not in self.schedule_versions:
+            return
+
+        schedule = Schedule.objects.filter(pk=pk).select_related("plugin").first()
+        if schedule is None:
+            plugin_pk = self.schedule_plugins.get(pk)
+            if self.prefetched_schedules is not None:
+                self.prefetched_schedules.get(plugin_pk, {}).pop(pk, None)
+            if plugin_pk is not None:
+                self.remove_job(plugin_pk, pk)
+            return
+
+        if schedule.enabled and schedule.version == self.schedule_versions.get(pk):
+            return
+
+        logger.debug(f"Schedule {schedule} changed in another process")
+        self.update_prefetched_schedule(schedule)
+        self.reload_schedule(schedule)
+
     def trigger_schedule(self, pk):
-        schedule = Schedule.objects.get(pk=pk)
-        if not schedule.enabled:
-            logger.warning(f"Trying to trigger disabled schedule {schedule.pk}")
+        stats = self.get_plugin_stats(self.schedule_plugins.get(pk))
+        run_time = None
+        if stats is not None:
+            run_time = stats.job_started(pk)
+
+        start_datetime = now()
+        start = time.perf_counter()
+        try:
+            with capture_log_chains() as logs:
+                failed = self.run_schedule(pk)
+        finally:
+            if stats is not None:
+                stats.job_finished()
+
+        if failed is None:
             return
 
-        plugin = schedule.plugin.get_plugin()
-        command = plugin.get_command(schedule.command)
-        kwargs = schedule.kwargs or {}
-        kwargs = command.parse_kwargs(kwargs)
+        try:
+            self.record_run(
+                pk,
+                run_time,
+                start_datetime,
+                time.perf_counter() - start,
+                failed,
+                logs[0] if logs else None,
+            )
+        except Exception:
+            logger.exception(f"Failed to record run of schedule {pk}")
+
+    def get_rollup(self, pk):
+        """
+        Returns the rollup of the recorded runs of a schedule. Runs are read from
+        the database as other processes may have fired the schedule.
+        """
+        rollup = ScheduleRunRollup()
+        for run in ScheduleRun.objects.filter(schedule_id=pk).only(
+            "planned_datetime", "start_datetime", "duration", "status"
+        ):
+            rollup.add(
+                run.duration, run.get_lag(), run.status == ScheduleRun.STATUS_FAILED
+            )
+        return rollup
+
+    def record_run(self, pk, run_time, start_datetime, duration, failed, log):
+        if run_time is not None and not settings.USE_TZ:
+            run_time = run_time.astimezone().replace(tzinfo=None)  # same as now()
+
+        ScheduleRun.objects.create(
+            schedule_id=pk,
+            planned_datetime=run_time,
+            start_datetime=start_datetime,
+            duration=duration,
+            status=ScheduleRun.STATUS_FAILED if failed else ScheduleRun.STATUS_SUCCESS,
+            log=log,
+        )
+
+        with self.trim_lock:
+            self.runs_since_trim[pk] += 1
+            trim = self.runs_since_trim[pk] >= self.trim_interval
+            if trim:
+                self.runs_since_trim[pk] = 0
+
+        if trim:
+            keep = getattr(settings, "SCHEDULE_RUN_HISTORY", 100)
+            ScheduleRun.objects.trim(pk, keep)
+
+    def run_schedule(self, pk):
+        """
+        Runs a schedule, returns if it failed or None if it was not run.
+        """
+        if self.leases and not self.leases.acquire(pk, self.schedule_versions.get(pk)):
+            logger.debug(f"Schedule {pk} is leased by another process or changed")
+            self.refresh_schedule(pk)
+            return None
+
+        start = time.perf_counter()
+        try:
+            compiled_schedule = self.compiled_schedules.get(pk)
+            if compiled_schedule is None:
+                schedule = Schedule.objects.get(pk=pk)
+                if not schedule.enabled:
+                    logger.warning(f"Trying to trigger disabled schedule {schedule.pk}")
+                    return None
+
+                compiled_schedule = self.compile_schedule(schedule)
+
+            plugin = compiled_schedule.plugin
+            command = compiled_schedule.command
+            kwargs = command.parse_kwargs(compiled_schedule.kwargs)
+        except Schedule.DoesNotExist:
+            logger.warning(f"Trying to trigger missing schedule {pk}")
+            return None
+        except Exception:
+            logger.exception(f"Failed to prepare schedule {pk}")
+            return True
+
         kwargs["self"] = plugin
 
+        failed = False
         try:
             _ = command.execute(kwargs)
         except Exception:
+            failed = True
             logger.exception(
                 f"Failed to execute {command} with args {kwargs} from schedule"
             )
 
+        schedule_metrics.observe(
+            (plugin.plugin_type, plugin.name, compiled_schedule.command_name),
+            time.perf_counter() - start,
+            failed=failed,
+        )
+
+        return failed
+
     def start(self):
         logger.debug("Started schedule manager")
         post_delete.connect(self.schedule_deleted, sender=Schedule)
         post_save.connect(self.schedule_modified, sender=Schedule)
         plugin_loaded.connect(self.plugin_loaded)
         plugin_unloaded.connect(self.plugin_unloaded)
+        schedules_changed.connect(self.schedules_changed)
+        settings.SCHEDULER.add_listener(self.job_missed, EVENT_JOB_MISSED)
+
+        lease_ttl = getattr(settings, "SCHEDULE_LEASE_TTL", None)
+        if lease_ttl:
+            self.leases = ScheduleLeases(lease_ttl)
+            settings.SCHEDULER.add_job(
+                self.leases.renew,
+                "interval",
+                seconds=max(lease_ttl / 3, 1),
+                id="schedule_lease_heartbeat",
+                replace_existing=True,
+            )
 
     def stop(self):
         logger.debug("Stopped schedule manager")
@@ -87,6 +656,13 @@ class ScheduleManager:
         post_save.disconnect(self.schedule_modified, sender=Schedule)
         plugin_loaded.disconnect(self.plugin_loaded)
         plugin_unloaded.disconnect(self.plugin_unloaded)
+        schedules_changed.disconnect(self.schedules_changed)
+        settings.SCHEDULER.remove_listener(self.job_missed)
+
+        if self.leases:
+            settings.SCHEDULER.remove_job("schedule_lease_heartbeat")
+            self.leases.release()
+            self.leases = None
 
 
 schedule_manager = ScheduleManager()
@@ -12,6 +12,7 @@ from .views import (
     ExternalPluginModelView,
     LoadedPluginView,
     LogModelView,
+    ModelLookupView,
     PermissionModelView,
     PluginBaseListView,
     PluginModelView,
@@ -155,6 +156,7 @@ class AdminService(ServicePlugin):
             "externalplugins", ExternalPluginModelView, basename="externalplugin"
         )
         router.register("loadedplugins", LoadedPluginView, basename="loadedplugin")
+        router.register("lookups", ModelLookupView, basename="lookup")
 
         return [
             url("^$", ShowAdminUrlsView.as_view(urls=router.urls, service=self))
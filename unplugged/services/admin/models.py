@@ -7,10 +7,12 @@ from pathlib import Path
 
 from django.conf import settings
 from django.db import models
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 from django.utils.text import slugify
 from jsonfield import JSONField
 
-from ...baseplugin import RelatedPluginField
+from ...baseplugin import RelatedPluginField, related_plugin_enum_cache
 from ...models import Plugin
 from ...pluginhandler import pluginhandler
 from ...schema import Schema, fields
@@ -526,6 +528,13 @@ class SimpleAdminPlugin(models.Model):
         return f"SimpleAdminPlugin {self.name}"
 
 
+@receiver(post_save, sender=SimpleAdminPlugin, dispatch_uid="sap_saved_enum_cache")
+@receiver(post_delete, sender=SimpleAdminPlugin, dispatch_uid="sap_deleted_enum_cache")
+def invalidate_related_plugin_enum_names(sender, **kwargs):
+    # Display names of plugins can come from a SimpleAdminPlugin
+    related_plugin_enum_cache.clear()
+
+
 class ExternalPlugin(models.Model):
     name = models.CharField(max_length=150, null=True)
     version = models.CharField(max_length=30, null=True)
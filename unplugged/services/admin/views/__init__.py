@@ -1,5 +1,6 @@
 from .externalplugin import ExternalPluginModelView, LoadedPluginView
 from .log import LogModelView
+from .lookup import ModelLookupView
 from .permission import PermissionModelView
 from .plugin import PluginBaseListView, PluginModelView
 from .scheduler import ScheduleModelView
@@ -22,4 +23,5 @@ __all__ = [
     "UserModelView",
     "ExternalPluginModelView",
     "LoadedPluginView",
+    "ModelLookupView",
 ]
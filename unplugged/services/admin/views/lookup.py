@@ -0,0 +1,85 @@
+import logging
+
+from django.core.exceptions import FieldDoesNotExist
+from django.http import Http404
+from rest_framework import permissions, serializers, viewsets
+from rest_framework.response import Response
+
+from ....baseplugin import model_lookups
+from ....jsonapi import (
+    JSONAPIObject,
+    JSONAPIRoot,
+    get_page_links,
+    get_page_parameters,
+    get_uri_builder,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class ModelLookupSerializer(serializers.Serializer):
+    id = serializers.CharField()
+    name = serializers.CharField()
+
+    class JSONAPIMeta:
+        resource_name = "lookup"
+
+
+class ModelLookupView(viewsets.ViewSet):
+    """
+    Searchable, paged listings of the objects a DjangoModelField in lookup mode
+    can refer to, e.g. lookups/<name>/?search=abc&page[offset]=0&page[limit]=50
+    """
+
+    serializer_class = ModelLookupSerializer
+    permission_classes = (permissions.IsAdminUser,)
+
+    default_limit = 50
+    max_limit = 500
+
+    service = None
+
+    def list(self, request):
+        root = JSONAPIRoot()
+        build_absolute_uri = get_uri_builder(request)
+
+        for name in sorted(model_lookups.keys()):
+            links = {"self": build_absolute_uri(f"{request.path}{name}/")}
+            root.append(JSONAPIObject("lookup", name, links=links))
+
+        return Response(root.serialize(request))
+
+    def retrieve(self, request, pk=None):
+        field = model_lookups.get(pk)
+        if field is None:
+            raise Http404
+
+        queryset = field.metadata["queryset"].all()
+        name_field = field.metadata.get("name_field", "pk")
+
+        search = request.GET.get("search")
+        if search:
+            try:
+                queryset.model._meta.get_field(name_field)
+            except FieldDoesNotExist:
+                logger.debug(f"Lookup {pk} cannot be searched on {name_field}")
+            else:
+                queryset = queryset.filter(**{f"{name_field}__icontains": search})
+
+        if not queryset.ordered:
+            queryset = queryset.order_by("pk")  # pages must not overlap or skip rows
+
+        offset, limit = get_page_parameters(request)
+        limit = min(limit or self.default_limit, self.max_limit)
+        objs = list(queryset[offset : offset + limit + 1])
+        has_next = len(objs) > limit
+
+        root = JSONAPIRoot()
+        root.paginate = False
+        for obj in objs[:limit]:
+            item = JSONAPIObject("lookup_item", obj.pk)
+            item["name"] = getattr(obj, name_field)
+            root.append(item)
+        root.links.update(get_page_links(request, offset, limit, has_next))
+
+        return Response(root.serialize(request))
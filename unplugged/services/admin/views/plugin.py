@@ -1,14 +1,22 @@
 import logging
+import threading
 
 from rest_framework import permissions, serializers, viewsets
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from rest_framework.utils.serializer_helpers import ReturnList
 
+from ....baseplugin import DjangoModelField, related_plugin_enum_cache
 from ....commands import CommandViewMixin
+from ....conditional import conditional_response, get_table_generation
 from ....jsonschema import dump_ui_schema
 from ....libs.marshmallow_jsonschema import JSONSchema
 from ....models import Plugin
+from ....models.plugin import PLUGIN_CACHE
 from ....pluginhandler import pluginhandler
+from ....scheduler import schedule_manager
+from ....schema import fields
+from ..models import SimpleAdminPlugin
 from .shared import ADMIN_RENDERER_CLASSES, ServiceAwareHyperlinkedIdentityField
 
 logger = logging.getLogger(__name__)
@@ -45,15 +53,121 @@ class PluginBaseSerializer(serializers.Serializer):
         # return dump_ui_schema(schema)
 
     def get_traits(self, obj):
-        if hasattr(obj, "__trait__"):
-            return obj.__trait__
-        else:
-            return []
+        return list(getattr(obj, "__traits__", []))
 
     def id(self, obj):
         return f"{obj.plugin_type}:{obj.plugin_name}"
 
 
+def get_schema_dependencies(schema):
+    """
+    Returns if the JSON Schema of schema lists plugins or model objects,
+    and the DjangoModelFields listing model objects.
+    """
+    dynamic = False
+    model_fields = []
+    seen = {type(schema)}
+    pending = list(schema.fields.values())
+    while pending:
+        field = pending.pop()
+        if isinstance(field, fields.Nested):
+            if type(field.schema) not in seen:
+                seen.add(type(field.schema))
+                pending.extend(field.schema.fields.values())
+        elif isinstance(field, fields.List):
+            pending.append(field.inner)
+        elif hasattr(field, "_jsonschema_type_mapping"):
+            if isinstance(field, DjangoModelField):
+                if field.metadata.get("lookup"):
+                    continue
+                model_fields.append(field)
+            dynamic = True
+
+    return dynamic, model_fields
+
+
+class PluginBaseCatalogEntry:
+    def __init__(self, plugin_base, dynamic, model_fields):
+        self.plugin_base = plugin_base
+        self.dynamic = dynamic
+        self.model_fields = model_fields
+        self.key = None
+        self.data = None
+
+
+class PluginBaseCatalog:
+    """
+    The serialized plugin bases. The catalog is rebuilt when plugins are registered,
+    bases with schemas that list plugins or model objects are serialized again when
+    those change. Listed model objects are read from the database on every check,
+    so changes from other processes and bulk queries are seen.
+    """
+
+    def __init__(self, serializer_class):
+        self.serializer_class = serializer_class
+        self.version = None
+        self.entries = []
+        self.lock = threading.Lock()
+
+    def get_key(self, entry):
+        if not entry.dynamic:
+            return None
+        return (related_plugin_enum_cache.get_generation(),) + tuple(
+            field.get_enum_generation() for field in entry.model_fields
+        )
+
+    def create_entry(self, plugin_base):
+        dynamic, model_fields = False, []
+        schemas = [plugin_base.config_schema()]
+        commands = getattr(plugin_base, "__commands__", None) or {}
+        schemas += [command.schema() for command in commands.values()]
+        for schema in schemas:
+            schema_dynamic, schema_model_fields = get_schema_dependencies(schema)
+            dynamic = dynamic or schema_dynamic
+            model_fields += schema_model_fields
+
+        return PluginBaseCatalogEntry(plugin_base, dynamic, model_fields)
+
+    def update_entries(self):
+        if self.version != pluginhandler.version:
+            self.version = pluginhandler.version
+            self.entries = [
+                self.create_entry(plugin_base)
+                for plugin_base in pluginhandler.get_all_plugins()
+            ]
+
+    def get_etag_parts(self):
+        """
+        Returns what the output of get() depends on, without serializing anything.
+        """
+        with self.lock:
+            self.update_entries()
+            return (self.version,) + tuple(self.get_key(e) for e in self.entries)
+
+    def get(self):
+        """
+        Returns serialized plugin bases ready to be rendered.
+        """
+        with self.lock:
+            self.update_entries()
+
+            for entry in self.entries:
+                key = self.get_key(entry)
+                if entry.data is None or entry.key != key:
+                    entry.key = key
+                    entry.data = self.serializer_class(entry.plugin_base).data
+
+            plugin_bases = [entry.plugin_base for entry in self.entries]
+            data = [entry.data for entry in self.entries]
+
+        return ReturnList(
+            data, serializer=self.serializer_class(plugin_bases, many=True)
+        )
+
+
+plugin_base_catalog = PluginBaseCatalog(PluginBaseSerializer)
+
+
 class PluginBaseListView(viewsets.ViewSet):
     renderer_classes = ADMIN_RENDERER_CLASSES
     serializer_class = PluginBaseSerializer
@@ -64,10 +178,17 @@ class PluginBaseListView(viewsets.ViewSet):
 
     service = None
 
+    def get_etag_parts(self, request):
+        return (
+            plugin_base_catalog.get_etag_parts(),
+            PLUGIN_CACHE.generation,
+            Plugin.objects.get_generation(),
+            get_table_generation(SimpleAdminPlugin),
+        )
+
+    @conditional_response
     def list(self, request):
-        pluginbases = list(pluginhandler.get_all_plugins())
-        serializer = self.serializer_class(pluginbases, many=True)
-        return Response(serializer.data)
+        return Response(plugin_base_catalog.get())
 
 
 class PluginSerializer(serializers.HyperlinkedModelSerializer):
@@ -95,10 +216,25 @@ class PluginModelView(viewsets.ModelViewSet, CommandViewMixin):
 
     service = None
 
+    def get_etag_parts(self, request):
+        return (Plugin.objects.get_generation(),)
+
+    @conditional_response
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @conditional_response
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
     @action(methods=["post"], detail=False, url_path="reload", url_name="reload")
     def reload_all(self, request):
         Plugin.objects.unload_all_plugins()
-        Plugin.objects.bootstrap()
+        schedule_manager.prefetch_schedules()
+        try:
+            Plugin.objects.bootstrap()
+        finally:
+            schedule_manager.clear_prefetched_schedules()
 
         return Response({"status": "success", "message": "Modules reloaded"})
 
@@ -1,6 +1,12 @@
+from datetime import datetime
+
+from django.conf import settings
 from rest_framework import permissions, serializers, viewsets
+from rest_framework.decorators import action
+from rest_framework.response import Response
 
 from ....models import FailedToParseScheduleException, Schedule, parse_schedule_trigger
+from ....scheduler import project_firing_density, schedule_manager
 from .shared import ADMIN_RENDERER_CLASSES
 
 
@@ -11,7 +17,7 @@ class ScheduleSerializer(serializers.HyperlinkedModelSerializer):
     class Meta:
         model = Schedule
         fields = "__all__"
-        read_only_fields = ["plugin"]
+        read_only_fields = ["plugin", "version"]
 
     class JSONAPIMeta:
         resource_name = "schedule"
@@ -25,6 +31,11 @@ class ScheduleSerializer(serializers.HyperlinkedModelSerializer):
         return data
 
 
+class ScheduleTriggerSerializer(serializers.Serializer):
+    method = serializers.ChoiceField(choices=Schedule._meta.get_field("method").choices)
+    method_config = serializers.CharField(max_length=500)
+
+
 class ScheduleModelView(viewsets.ModelViewSet):
     queryset = Schedule.objects.all()
     serializer_class = ScheduleSerializer
@@ -34,3 +45,62 @@ class ScheduleModelView(viewsets.ModelViewSet):
     filterset_fields = ("plugin",)
 
     service = None
+
+    max_density_minutes = 24 * 60
+
+    @action(methods=["get"], detail=False)
+    def queues(self, request):
+        return Response(
+            [
+                dict(plugin_id=plugin_pk, **stats)
+                for plugin_pk, stats in sorted(schedule_manager.get_stats().items())
+            ]
+        )
+
+    @action(methods=["get"], detail=True)
+    def statistics(self, request, pk=None):
+        schedule = self.get_object()
+        return Response(schedule_manager.get_rollup(schedule.pk).serialize())
+
+    @action(methods=["get"], detail=False)
+    def density(self, request):
+        """
+        Projected fires per minute of the enabled schedules for the next
+        ?minutes= minutes, 60 if not set.
+        """
+        try:
+            minutes = int(request.GET.get("minutes", 60))
+        except ValueError:
+            minutes = 60
+        minutes = max(1, min(minutes, self.max_density_minutes))
+
+        start = datetime.now(settings.SCHEDULER.timezone)
+        density = project_firing_density(
+            Schedule.objects.filter(enabled=True), start, minutes
+        )
+        return Response(
+            {
+                "max_fires": max(d["fires"] for d in density),
+                "max_peak_second": max(d["peak_second"] for d in density),
+                "minutes": density,
+            }
+        )
+
+    @action(methods=["post"], detail=False, url_path="validate", url_name="validate")
+    def validate_triggers(self, request):
+        """
+        Validates a list of method and method_config pairs without saving anything.
+        """
+        serializer = ScheduleTriggerSerializer(data=request.data, many=True)
+        serializer.is_valid(raise_exception=True)
+
+        results = []
+        for data in serializer.validated_data:
+            try:
+                parse_schedule_trigger(data["method"], data["method_config"])
+            except FailedToParseScheduleException as e:
+                results.append({"valid": False, "error": e.args[0]})
+            else:
+                results.append({"valid": True, "error": None})
+
+        return Response(results)
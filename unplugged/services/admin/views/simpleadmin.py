@@ -10,9 +10,13 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from ....jsonapi import JSONAPIObject, JSONAPIRoot
+from ....conditional import conditional_response, get_table_generation
+from ....jsonapi import JSONAPIObject, JSONAPIRoot, get_uri_builder
 from ....jsonschema import dump_ui_schema
 from ....libs.marshmallow_jsonschema import JSONSchema
+from ....models import Plugin
+from ....models.plugin import PLUGIN_CACHE
+from ....pluginhandler import pluginhandler
 from ....schema import ValidationError
 from ..models import NameAlreadyInUseException, SimpleAdminPlugin, SimpleAdminTemplate
 from .shared import ADMIN_RENDERER_CLASSES, ServiceAwareHyperlinkedIdentityField
@@ -61,6 +65,22 @@ class SimpleAdminTemplateModelView(viewsets.ModelViewSet):
 
     service = None
 
+    def get_etag_parts(self, request):
+        return (
+            get_table_generation(SimpleAdminTemplate),
+            pluginhandler.version,
+            PLUGIN_CACHE.generation,
+            Plugin.objects.get_generation(),
+        )
+
+    @conditional_response
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @conditional_response
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
 
 class SimpleAdminPluginSerializer(serializers.HyperlinkedModelSerializer):
     url = ServiceAwareHyperlinkedIdentityField(view_name="simpleadmin_plugin-detail")
@@ -125,6 +145,22 @@ class SimpleAdminPluginModelView(viewsets.ModelViewSet):
 
     service = None
 
+    def get_etag_parts(self, request):
+        return (
+            get_table_generation(SimpleAdminPlugin),
+            get_table_generation(SimpleAdminTemplate),
+            pluginhandler.version,
+            Plugin.objects.get_generation(),
+        )
+
+    @conditional_response
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @conditional_response
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
     @action(methods=["post"], detail=False)
     def set_priorities(self, request):
         serializer = SimpleAdminPluginPrioritySerializer(data=request.data)
@@ -295,6 +331,7 @@ class ShowAdminUrlsView(APIView):
 
     def get(self, request):
         root = JSONAPIRoot()
+        build_absolute_uri = get_uri_builder(request)
 
         for url in self.urls:
             if url.name.endswith("-detail"):
@@ -314,7 +351,7 @@ class ShowAdminUrlsView(APIView):
                     url.name.split("-", 1)[1].replace("-", "_"),
                 )
 
-            links = {"self": request.build_absolute_uri(view_url)}
+            links = {"self": build_absolute_uri(view_url)}
             plugin_type = "admin_%s" % (view_id,)
             obj = JSONAPIObject(plugin_type, resource_name, links=links)
             root.append(obj)
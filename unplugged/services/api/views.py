@@ -4,8 +4,10 @@ from rest_framework import permissions
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from ...jsonapi import JSONAPIObject, JSONAPIRoot
+from ...conditional import conditional_response
+from ...jsonapi import JSONAPIObject, JSONAPIRoot, get_uri_builder
 from ...models import Plugin
+from ...models.plugin import PLUGIN_CACHE
 
 logger = logging.getLogger(__name__)
 
@@ -15,11 +17,32 @@ class APIConfigView(APIView):
 
     permission_classes = (permissions.AllowAny,)
 
+    def get_etag_parts(self, request):
+        user = request.user
+        if user.is_authenticated:
+            user_parts = (
+                user.pk,
+                user.is_active,
+                user.is_staff,
+                user.is_superuser,
+                sorted(user.get_all_permissions()),
+            )
+        else:
+            user_parts = None
+
+        return (
+            PLUGIN_CACHE.generation,
+            Plugin.objects.get_generation(),
+            user_parts,
+        )
+
+    @conditional_response
     def get(self, request):
         root = JSONAPIRoot()
+        build_absolute_uri = get_uri_builder(request)
 
         for plugin in Plugin.objects.filter(enabled=True, plugin_type="service"):
-            links = {"self": request.build_absolute_uri("/%s/" % plugin.name)}
+            links = {"self": build_absolute_uri("/%s/" % plugin.name)}
             plugin_type = "%s_%s" % (plugin.plugin_type, plugin.plugin_name)
 
             plugin_obj = plugin.get_plugin()
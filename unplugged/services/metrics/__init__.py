@@ -0,0 +1 @@
+default_app_config = "unplugged.services.metrics.apps.AppConfig"
@@ -0,0 +1,10 @@
+from django.apps import AppConfig as DjangoAppConfig
+
+
+class AppConfig(DjangoAppConfig):
+    name = "unplugged.services.metrics"
+    verbose_name = "Metrics Service"
+    label = "services_metrics"
+
+    def ready(self):
+        from .handler import MetricsServicePlugin  # NOQA
@@ -0,0 +1,16 @@
+from django.conf.urls import url
+
+from ...plugins import ServicePlugin
+from ...schema import Schema
+from .views import MetricsView
+
+
+class MetricsServicePlugin(ServicePlugin):
+    plugin_name = "metrics"
+    config_schema = Schema
+
+    def get_urls(self):
+        return [url("^/?$", MetricsView.as_view(service=self))]
+
+    def unload(self):
+        pass
@@ -0,0 +1,20 @@
+import logging
+
+from django.http import HttpResponse
+from rest_framework import permissions
+from rest_framework.views import APIView
+
+from ...metrics import render_metrics
+
+logger = logging.getLogger(__name__)
+
+
+class MetricsView(APIView):
+    service = None
+
+    permission_classes = (permissions.IsAdminUser,)
+
+    def get(self, request):
+        return HttpResponse(
+            render_metrics(), content_type="text/plain; version=0.0.4; charset=utf-8"
+        )
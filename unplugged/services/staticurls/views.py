@@ -4,7 +4,9 @@ from rest_framework import permissions
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from ...conditional import conditional_response
 from ...models import Plugin
+from ...pluginhandler import pluginhandler
 
 logger = logging.getLogger(__name__)
 
@@ -14,5 +16,9 @@ class StaticUrlsView(APIView):
 
     permission_classes = (permissions.IsAuthenticated,)
 
+    def get_etag_parts(self, request):
+        return (pluginhandler.version, id(self.service.plugin_url_root))
+
+    @conditional_response
     def get(self, request):
         return Response(self.service.plugin_url_root.serialize(request))
@@ -24,8 +24,8 @@ class WAMPServicePlugin(ServicePlugin):
             )
         ]
 
-    def realm_authenticator(user, realm):
-        if not user or not user.is_authenticated():
+    def realm_authenticator(self, user, realm):
+        if not user or not user.is_authenticated:
             logger.info(f"User not authenticated for realm {realm}")
             return False
 
@@ -35,7 +35,7 @@ class WAMPServicePlugin(ServicePlugin):
 
         return True
 
-    def wamp_guard(user, method, uri):
+    def wamp_guard(self, user, method, uri):
         if not user:
             return False
 
@@ -54,7 +54,12 @@ class WAMPServicePlugin(ServicePlugin):
             if len(uri) < 3:
                 return False
 
-            plugin_type, name = uri.split(".")[1:3]
+            plugin_type, name = uri[1:3]
+            if len(uri) > 3 and uri[3] == "command":
+                # Commands are registered by the server and are admin-only,
+                # just like the HTTP command endpoint.
+                return method == "call" and user.is_staff
+
             if user.has_perm(f"unplugged.{plugin_type}.{name}"):
                 return True
 
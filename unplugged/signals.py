@@ -3,5 +3,9 @@ import django.dispatch
 plugin_loaded = django.dispatch.Signal(providing_args=["plugin"])
 plugin_unloaded = django.dispatch.Signal(providing_args=["plugin"])
 
+schedules_changed = django.dispatch.Signal(providing_args=["plugin", "schedules"])
+
+log_messages_created = django.dispatch.Signal(providing_args=["log_messages"])
+
 wamp_realm_created = django.dispatch.Signal()
 wamp_realm_discarded = django.dispatch.Signal()
@@ -0,0 +1,147 @@
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from unplugged import Schema, ServicePlugin
+
+from ..baseplugin import DjangoModelField
+from ..models import Log, Plugin
+from ..services.admin.models import SimpleAdminPlugin, SimpleAdminTemplate
+from ..services.admin.views.lookup import ModelLookupView
+from ..services.admin.views.plugin import PluginBaseListView, plugin_base_catalog
+from ..services.admin.views.simpleadmin import (
+    SimpleAdminPluginModelView,
+    SimpleAdminTemplateModelView,
+)
+
+
+class LogSchema(Schema):
+    log = DjangoModelField(queryset=Log.objects.order_by("pk"), name_field="action")
+
+
+class LogLookupSchema(Schema):
+    log = DjangoModelField(
+        queryset=Log.objects.all(), name_field="action", lookup="test_logs"
+    )
+
+
+class LogReferencingPlugin(ServicePlugin):
+    plugin_name = "log_referencing"
+    config_schema = LogSchema
+
+
+def get_log_enum():
+    for plugin_base in plugin_base_catalog.get():
+        if plugin_base["plugin_name"] == "log_referencing":
+            return plugin_base["schema"]["properties"]["log"]["enumNames"]
+
+
+class PluginBaseCatalogTestCase(TestCase):
+    def setUp(self):
+        self.log = Log.objects.create(action="first")
+
+    def test_update(self):
+        etag_parts = plugin_base_catalog.get_etag_parts()
+        self.assertEqual(get_log_enum(), ["first"])
+
+        Log.objects.filter(pk=self.log.pk).update(action="renamed")
+
+        self.assertNotEqual(plugin_base_catalog.get_etag_parts(), etag_parts)
+        self.assertEqual(get_log_enum(), ["renamed"])
+
+    def test_bulk_create(self):
+        etag_parts = plugin_base_catalog.get_etag_parts()
+        self.assertEqual(get_log_enum(), ["first"])
+
+        Log.objects.bulk_create([Log(action="second")])
+
+        self.assertNotEqual(plugin_base_catalog.get_etag_parts(), etag_parts)
+        self.assertEqual(get_log_enum(), ["first", "second"])
+
+    def test_unchanged(self):
+        etag_parts = plugin_base_catalog.get_etag_parts()
+        self.assertEqual(plugin_base_catalog.get_etag_parts(), etag_parts)
+
+
+class SimpleAdminETagTestCase(TestCase):
+    def setUp(self):
+        self.template = SimpleAdminTemplate.objects.create(
+            display_name="Template",
+            template_id="template",
+            plugin_type="service",
+            plugin_name="log_referencing",
+            template={},
+            update_method=SimpleAdminTemplate.UPDATE_METHOD_FULL,
+        )
+        plugin = Plugin.objects.create(
+            name="referencing", plugin_type="service", plugin_name="log_referencing"
+        )
+        self.simpleadmin_plugin = SimpleAdminPlugin.objects.create(
+            template=self.template, plugin=plugin, name="referencing"
+        )
+        self.views = [
+            SimpleAdminTemplateModelView(),
+            SimpleAdminPluginModelView(),
+            PluginBaseListView(),
+        ]
+
+    def get_etag_parts(self):
+        return [view.get_etag_parts(None) for view in self.views]
+
+    def test_update(self):
+        etag_parts = self.get_etag_parts()
+        self.assertEqual(self.get_etag_parts(), etag_parts)
+
+        SimpleAdminTemplate.objects.filter(pk=self.template.pk).update(
+            display_name="Renamed"
+        )
+
+        new_etag_parts = self.get_etag_parts()
+        self.assertNotEqual(new_etag_parts[0], etag_parts[0])
+        self.assertNotEqual(new_etag_parts[1], etag_parts[1])
+        self.assertEqual(new_etag_parts[2], etag_parts[2])
+
+    def test_simpleadmin_plugin_update(self):
+        etag_parts = self.get_etag_parts()
+
+        SimpleAdminPlugin.objects.filter(pk=self.simpleadmin_plugin.pk).update(
+            display_name="Renamed"
+        )
+
+        new_etag_parts = self.get_etag_parts()
+        self.assertEqual(new_etag_parts[0], etag_parts[0])
+        self.assertNotEqual(new_etag_parts[1], etag_parts[1])
+        self.assertNotEqual(new_etag_parts[2], etag_parts[2])
+
+
+@override_settings(ALLOWED_HOSTS=["testserver"])
+class ModelLookupViewTestCase(TestCase):
+    def setUp(self):
+        self.logs = [Log.objects.create(action=f"log {i}") for i in range(7)]
+        self.user = User.objects.create(username="admin", is_staff=True)
+
+    def get_page(self, url):
+        request = APIRequestFactory().get(url)
+        force_authenticate(request, self.user)
+        response = ModelLookupView.as_view({"get": "retrieve"})(request, pk="test_logs")
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_pages(self):
+        self.assertFalse(LogLookupSchema().fields["log"].metadata["queryset"].ordered)
+
+        pks = []
+        url = "/lookups/test_logs/?page[limit]=2"
+        while url:
+            page = self.get_page(url)
+            pks += [item["id"] for item in page["data"]]
+            url = page["links"].get("next")
+
+        self.assertEqual(pks, [log.pk for log in self.logs])
+
+    def test_search(self):
+        page = self.get_page("/lookups/test_logs/?search=log 3")
+        self.assertEqual(
+            [(item["id"], item["attributes"]["name"]) for item in page["data"]],
+            [(self.logs[3].pk, "log 3")],
+        )
@@ -0,0 +1,141 @@
+import json
+
+from django.test import RequestFactory, SimpleTestCase
+
+from ..commands import Command, stream_ndjson
+from ..jsonapi import JSONAPIObject
+from ..metrics import command_metrics
+from ..schema import Schema, ValidationError, fields
+
+
+class StreamNDJSONTestCase(SimpleTestCase):
+    def setUp(self):
+        self.request = RequestFactory().get("/")
+
+    def stream(self, items):
+        return [json.loads(line) for line in stream_ndjson(iter(items), self.request)]
+
+    def test_included(self):
+        author = JSONAPIObject("author", 1)
+        author["name"] = "Author"
+        book = JSONAPIObject("book", 2)
+        book["title"] = "Book"
+        book.add_relationship("author", author)
+
+        self.assertEqual(
+            self.stream([book, {"plain": True}]),
+            [
+                {
+                    "data": {
+                        "type": "book",
+                        "id": 2,
+                        "attributes": {"title": "Book"},
+                        "relationships": {
+                            "author": {"data": [{"type": "author", "id": 1}]}
+                        },
+                    },
+                    "included": [
+                        {"type": "author", "id": 1, "attributes": {"name": "Author"}}
+                    ],
+                },
+                {"plain": True},
+            ],
+        )
+
+    def test_error(self):
+        def items():
+            yield {"first": True}
+            raise ValueError
+
+        lines = self.stream(items())
+        self.assertEqual(lines[0], {"first": True})
+        self.assertEqual(lines[1]["errors"][0]["id"], "execution_failed")
+
+
+class FakePlugin:
+    plugin_type = "service"
+    name = "fake"
+
+
+class CommandMetricsTestCase(SimpleTestCase):
+    def setUp(self):
+        command_metrics.clear()
+
+    def get_series(self, name):
+        return command_metrics.series.get(("service", "fake", name))
+
+    def execute(self, fn):
+        return Command(fn).execute({"self": FakePlugin()})
+
+    def test_call(self):
+        def command_work(self):
+            return {"done": True}
+
+        self.assertEqual(self.execute(command_work), {"done": True})
+        series = self.get_series("work")
+        self.assertEqual((series.calls, series.errors), (1, 0))
+
+    def test_iterator(self):
+        def command_items(self):
+            yield from range(3)
+
+        self.assertEqual(list(self.execute(command_items)), [0, 1, 2])
+        series = self.get_series("items")
+        self.assertEqual((series.calls, series.errors), (1, 0))
+
+    def test_iterator_failed(self):
+        def command_items(self):
+            yield 1
+            raise ValueError
+
+        with self.assertRaises(ValueError):
+            list(self.execute(command_items))
+        series = self.get_series("items")
+        self.assertEqual((series.calls, series.errors), (1, 1))
+
+    def test_iterator_closed(self):
+        def command_items(self):
+            yield from range(3)
+
+        items = self.execute(command_items)
+        self.assertEqual(next(items), 0)
+        items.close()
+
+        self.assertIsNone(self.get_series("items"))
+
+
+class KwargsSchema(Schema):
+    count = fields.Integer(required=True)
+    tags = fields.List(fields.String(), missing=list)
+
+
+class ParseKwargsTestCase(SimpleTestCase):
+    def setUp(self):
+        def command_work(self, count, tags):
+            pass
+
+        self.command = Command(command_work, schema=KwargsSchema)
+
+    def test_parse_kwargs(self):
+        self.assertEqual(
+            self.command.parse_kwargs({"count": "3", "extra": 1}),
+            {"count": 3, "tags": [], "extra": 1},
+        )
+        self.assertEqual(
+            self.command.parse_kwargs({"count": 4, "tags": ["a"]}),
+            {"count": 4, "tags": ["a"]},
+        )
+
+    def test_invalid_kwargs(self):
+        with self.assertRaises(ValidationError) as cm:
+            self.command.parse_kwargs({"count": "many"})
+        self.assertEqual(list(cm.exception.messages), ["count"])
+
+        with self.assertRaises(ValidationError) as cm:
+            self.command.parse_kwargs({})
+        self.assertEqual(list(cm.exception.messages), ["count"])
+
+    def test_schema_reused(self):
+        compiled_schema = self.command.compiled_schema
+        self.command.parse_kwargs({"count": 1})
+        self.assertIs(self.command.compiled_schema, compiled_schema)
@@ -0,0 +1,139 @@
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from ..jsonapi import JSONAPIObject, JSONAPIRoot
+
+
+class Book:
+    def get_absolute_url(self):
+        return "/books/2/"
+
+    def get_additional_urls(self):
+        return {"cover": "/books/2/cover/"}
+
+
+@override_settings(ALLOWED_HOSTS=["testserver"])
+class JSONAPIObjectTestCase(SimpleTestCase):
+    def setUp(self):
+        self.request = RequestFactory().get("/")
+
+    def test_slots(self):
+        obj = JSONAPIObject("book", 2)
+        self.assertFalse(hasattr(obj, "__dict__"))
+        self.assertIsNone(obj._relationships)
+        self.assertIsNone(obj._local_relationships)
+
+    def test_serialize(self):
+        obj = JSONAPIObject("book", 2, Book(), links={"extra": "http://example/"})
+        obj["title"] = "Book"
+
+        self.assertEqual(
+            obj.serialize(self.request),
+            {
+                "type": "book",
+                "id": 2,
+                "attributes": {"title": "Book"},
+                "links": {
+                    "self": "http://testserver/books/2/",
+                    "cover": "http://testserver/books/2/cover/",
+                    "extra": "http://example/",
+                },
+            },
+        )
+
+    def test_relationships(self):
+        root = JSONAPIRoot()
+        book = JSONAPIObject("book", 2)
+        root.append(book)
+        author = JSONAPIObject("author", 1)
+        author["name"] = "Author"
+        book.add_relationship("author", author)
+        book.add_relationship("note", JSONAPIObject("note", 3, populated=False), True)
+
+        self.assertEqual(
+            book.serialize(self.request),
+            {
+                "type": "book",
+                "id": 2,
+                "attributes": {},
+                "relationships": {
+                    "author": {"data": [{"type": "author", "id": 1}]},
+                    "note": {"data": [{"type": "note", "id": 3}]},
+                },
+            },
+        )
+        self.assertEqual(list(root.included), [("author", 1)])
+
+    def test_sparse_fields(self):
+        obj = JSONAPIObject("book", 2)
+        obj.update({"title": "Book", "pages": 100})
+
+        self.assertEqual(
+            obj.serialize(self.request, ["pages"])["attributes"], {"pages": 100}
+        )
+
+
+@override_settings(ALLOWED_HOSTS=["testserver"])
+class JSONAPIRootTestCase(SimpleTestCase):
+    def get_root(self, count, lazy=False):
+        root = JSONAPIRoot()
+        books = []
+        for i in range(count):
+            book = JSONAPIObject("book", i)
+            book.update({"title": f"Book {i}", "pages": i * 10})
+            book.add_relationship("author", JSONAPIObject("author", i % 2))
+            books.append(book)
+
+        if lazy:
+            root.extend(iter(books))
+        else:
+            for book in books:
+                root.append(book)
+                for relationship in book._relationships["author"]:
+                    root.add_included(relationship)
+        return root
+
+    def serialize(self, root, url="/books/"):
+        return root.serialize(RequestFactory().get(url))
+
+    def test_single_object(self):
+        data = self.serialize(self.get_root(1))["data"]
+        self.assertEqual(data["id"], 0)
+
+    def test_sparse_fieldsets(self):
+        document = self.serialize(self.get_root(2), "/books/?fields[book]=title")
+        self.assertEqual(
+            [obj["attributes"] for obj in document["data"]],
+            [{"title": "Book 0"}, {"title": "Book 1"}],
+        )
+
+    def test_pages(self):
+        for lazy in (False, True):
+            url = "/books/?page[limit]=2"
+            ids, authors = [], []
+            while url:
+                document = self.serialize(self.get_root(5, lazy), url)
+                self.assertIsInstance(document["data"], list)
+                ids += [obj["id"] for obj in document["data"]]
+                authors.append(sorted(obj["id"] for obj in document["included"]))
+                url = document["links"].get("next")
+
+            self.assertEqual(ids, [0, 1, 2, 3, 4])
+            self.assertEqual(authors, [[0, 1], [0, 1], [0]])
+
+    def test_page_with_one_object(self):
+        document = self.serialize(
+            self.get_root(5), "/books/?page[offset]=4&page[limit]=2"
+        )
+        self.assertEqual([obj["id"] for obj in document["data"]], [4])
+        self.assertNotIn("next", document["links"])
+        self.assertIn("page%5Boffset%5D=2", document["links"]["prev"])
+
+    def test_unpaginated(self):
+        root = self.get_root(5)
+        root.paginate = False
+        document = self.serialize(root, "/books/?page[limit]=2")
+        self.assertEqual(len(document["data"]), 5)
+
+        root = self.get_root(1)
+        root.paginate = False
+        self.assertIsInstance(self.serialize(root)["data"], list)
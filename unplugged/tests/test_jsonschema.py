@@ -0,0 +1,79 @@
+import gc
+
+from django.test import TestCase
+
+from ..baseplugin import DjangoModelField
+from ..libs.marshmallow_jsonschema import JSONSchema
+from ..models import Log
+from ..schema import Schema, fields
+
+
+class AddressSchema(Schema):
+    street = fields.String(required=True)
+
+
+class PersonSchema(Schema):
+    name = fields.String(required=True)
+    age = fields.Integer(default=18)
+    address = fields.Nested(AddressSchema)
+
+
+class LogReferenceSchema(Schema):
+    log = DjangoModelField(queryset=Log.objects.order_by("pk"), name_field="action")
+
+
+class JSONSchemaCacheTestCase(TestCase):
+    def setUp(self):
+        JSONSchema.clear_cache()
+
+    def test_cached_dump(self):
+        dumped = JSONSchema().dump(PersonSchema())
+        self.assertIn(PersonSchema, JSONSchema._dump_cache)
+
+        dumped["properties"]["name"]["title"] = "changed"
+        self.assertEqual(
+            JSONSchema().dump(PersonSchema())["properties"]["name"]["title"], "name"
+        )
+
+        JSONSchema.clear_cache()
+        self.assertEqual(
+            JSONSchema().dump(PersonSchema()), JSONSchema().dump(PersonSchema())
+        )
+
+    def test_cached_nested_definitions(self):
+        json_schema = JSONSchema()
+        uncached = json_schema.dump(PersonSchema())
+        definitions = dict(json_schema._nested_schema_classes)
+
+        json_schema = JSONSchema()
+        self.assertEqual(json_schema.dump(PersonSchema()), uncached)
+        self.assertEqual(json_schema._nested_schema_classes, definitions)
+
+    def test_dynamic_schema_classes(self):
+        def dump_dynamic_schemas(count):
+            for i in range(count):
+                schema_class = type("DynamicSchema", (Schema,), {"x": fields.String()})
+                JSONSchema().dump(schema_class())
+            del schema_class
+            gc.collect()
+            return len(JSONSchema._dump_cache)
+
+        # a few recent classes may linger, but the cache must not keep them all
+        self.assertEqual(dump_dynamic_schemas(10), dump_dynamic_schemas(100))
+
+
+class JSONSchemaModelFieldTestCase(TestCase):
+    def test_not_cached(self):
+        JSONSchema.clear_cache()
+        first = Log.objects.create(action="first")
+        self.assertEqual(
+            JSONSchema().dump(LogReferenceSchema())["properties"]["log"]["enum"],
+            [first.pk],
+        )
+        self.assertNotIn(LogReferenceSchema, JSONSchema._dump_cache)
+
+        second = Log.objects.create(action="second")
+        self.assertEqual(
+            JSONSchema().dump(LogReferenceSchema())["properties"]["log"]["enum"],
+            [first.pk, second.pk],
+        )
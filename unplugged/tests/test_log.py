@@ -0,0 +1,123 @@
+import time
+
+from django.test import TransactionTestCase, override_settings
+from django.utils.timezone import now
+
+from ..models import Log, LogMessage
+from ..models.log import LogChain, LogMessageWriter
+from ..signals import log_messages_created
+
+
+class LogMessageWriterTestCase(TransactionTestCase):
+    def setUp(self):
+        self.log = Log.objects.create(action="test")
+        self.writer = LogMessageWriter()
+        self.published = []
+        log_messages_created.connect(self.log_messages_created)
+
+    def tearDown(self):
+        log_messages_created.disconnect(self.log_messages_created)
+
+    def log_messages_created(self, sender, log_messages, **kwargs):
+        self.published.append(list(log_messages))
+
+    def wait_written(self, count, timeout=5):
+        deadline = time.monotonic() + timeout
+        while self.writer.written < count and time.monotonic() < deadline:
+            time.sleep(0.01)
+        return self.writer.written
+
+    def add(self, *msgs, datetime=None):
+        for msg in msgs:
+            log_message = LogMessage(log=self.log, msg=msg)
+            if datetime is not None:
+                log_message.datetime = datetime
+            self.writer.add(log_message)
+
+    @override_settings(LOG_MESSAGE_BATCH_SIZE=100, LOG_MESSAGE_FLUSH_INTERVAL=60)
+    def test_flush_order(self):
+        msgs = [f"message {i}" for i in range(10)]
+        self.add(*msgs)
+        self.writer.flush()
+
+        self.assertEqual(self.writer.written, 10)
+        self.assertEqual(
+            list(LogMessage.objects.order_by("pk").values_list("msg", flat=True)), msgs
+        )
+
+    @override_settings(LOG_MESSAGE_BATCH_SIZE=100, LOG_MESSAGE_FLUSH_INTERVAL=60)
+    def test_published_pks(self):
+        timestamp = now()
+        self.add("same", "same", "other", "same", datetime=timestamp)
+        self.add("later")
+        self.writer.flush()
+
+        published = [m for batch in self.published for m in batch]
+        self.assertEqual(
+            [(m.pk, m.msg) for m in published],
+            list(LogMessage.objects.order_by("pk").values_list("pk", "msg")),
+        )
+
+    @override_settings(LOG_MESSAGE_BATCH_SIZE=3, LOG_MESSAGE_FLUSH_INTERVAL=60)
+    def test_batch_size(self):
+        self.add("a", "b")
+        time.sleep(0.1)
+        self.assertEqual(self.writer.written, 0)
+
+        self.add("c")
+        self.assertEqual(self.wait_written(3), 3)
+        self.assertEqual([len(batch) for batch in self.published], [3])
+
+    @override_settings(LOG_MESSAGE_BATCH_SIZE=100, LOG_MESSAGE_FLUSH_INTERVAL=0.2)
+    def test_flush_interval(self):
+        self.add("a")
+        self.assertEqual(self.wait_written(1), 1)
+        self.assertEqual(LogMessage.objects.get().msg, "a")
+
+
+class LogChainProgressTestCase(TransactionTestCase):
+    def setUp(self):
+        self.log = Log.objects.create(action="test")
+        self.chain = LogChain(self.log)
+
+    def get_saved_progress(self):
+        return Log.objects.get(pk=self.log.pk).progress
+
+    def wait_saved_progress(self, progress, timeout=5):
+        deadline = time.monotonic() + timeout
+        while self.get_saved_progress() != progress and time.monotonic() < deadline:
+            time.sleep(0.01)
+        return self.get_saved_progress()
+
+    @override_settings(LOG_PROGRESS_INTERVAL=0.2)
+    def test_trailing_save(self):
+        self.chain.log(progress=1)
+        self.assertEqual(self.get_saved_progress(), 1)
+
+        for progress in range(2, 101):
+            self.chain.log(progress=progress)
+        self.assertEqual(self.get_saved_progress(), 1)
+
+        self.assertEqual(self.wait_saved_progress(100), 100)
+        self.chain.finish_chain(Log.STATUS_SUCCESS)
+
+    @override_settings(LOG_PROGRESS_INTERVAL=60)
+    def test_finish_saves_last_progress(self):
+        self.chain.log(progress=1)
+        self.chain.log(progress=50)
+        self.assertEqual(self.get_saved_progress(), 1)
+
+        self.chain.finish_chain(Log.STATUS_SUCCESS)
+        log = Log.objects.get(pk=self.log.pk)
+        self.assertEqual((log.progress, log.status), (50, Log.STATUS_SUCCESS))
+        self.assertIsNone(self.chain._progress_timer)
+
+    @override_settings(LOG_PROGRESS_INTERVAL=None, LOG_PROGRESS_STEP=10)
+    def test_step(self):
+        self.chain.log(progress=1)
+        self.chain.log(progress=5)
+        self.assertEqual(self.get_saved_progress(), 1)
+
+        self.chain.log(progress=11)
+        self.assertEqual(self.get_saved_progress(), 11)
+        self.chain.finish_chain(Log.STATUS_SUCCESS)
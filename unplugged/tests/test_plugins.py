@@ -0,0 +1,171 @@
+from unittest import mock
+
+from django.test import SimpleTestCase, TestCase
+
+from unplugged import RelatedPluginField, Schema, ServicePlugin
+
+from ..baseplugin import related_plugin_enum_cache
+from ..libs.marshmallow_jsonschema import JSONSchema
+from ..models import Plugin
+from ..pluginhandler import PluginHandler, pluginhandler
+
+
+class TraitedPlugin(ServicePlugin):
+    plugin_name = "traited"
+    config_schema = Schema
+    __traits__ = ["searchable", "listable"]
+
+
+class PartlyTraitedPlugin(ServicePlugin):
+    plugin_name = "partly_traited"
+    config_schema = Schema
+    __traits__ = ["listable"]
+
+
+class TraitsSchema(Schema):
+    plugin = RelatedPluginField(
+        plugin_type=ServicePlugin, traits=["searchable", "listable"]
+    )
+
+
+class TraitIndexTestCase(TestCase):
+    def tearDown(self):
+        Plugin.objects.unload_all_plugins()
+
+    def test_class_index(self):
+        self.assertEqual(
+            pluginhandler.get_plugins_with_traits("service", ["listable"]),
+            {TraitedPlugin, PartlyTraitedPlugin},
+        )
+        self.assertEqual(
+            pluginhandler.get_plugins_with_traits(
+                "service", ["searchable", "listable"]
+            ),
+            {TraitedPlugin},
+        )
+        self.assertEqual(
+            pluginhandler.get_plugins_with_traits("service", ["missing"]), set()
+        )
+
+    def test_related_plugin_enum(self):
+        traited = Plugin.objects.create(
+            name="traited", plugin_type="service", plugin_name="traited", enabled=True
+        )
+        Plugin.objects.create(
+            name="partly_traited",
+            plugin_type="service",
+            plugin_name="partly_traited",
+            enabled=True,
+        )
+        Plugin.objects.create(
+            name="disabled", plugin_type="service", plugin_name="traited"
+        )
+
+        schema = JSONSchema().dump(TraitsSchema())
+        self.assertEqual(schema["properties"]["plugin"]["enum"], [traited.pk])
+
+
+class RelatedPluginEnumCacheTestCase(TestCase):
+    def setUp(self):
+        self.traited = Plugin.objects.create(
+            name="traited", plugin_type="service", plugin_name="traited", enabled=True
+        )
+        self.traited.get_plugin()
+        related_plugin_enum_cache.clear()
+
+    def tearDown(self):
+        Plugin.objects.unload_all_plugins()
+
+    def get_enum(self):
+        return JSONSchema().dump(TraitsSchema())["properties"]["plugin"]["enum"]
+
+    def test_cached(self):
+        self.assertEqual(self.get_enum(), [self.traited.pk])
+
+        with mock.patch.object(related_plugin_enum_cache, "sync_interval", 60):
+            with self.assertNumQueries(0):
+                self.assertEqual(self.get_enum(), [self.traited.pk])
+
+    def test_saved_plugin(self):
+        self.assertEqual(self.get_enum(), [self.traited.pk])
+
+        with mock.patch.object(related_plugin_enum_cache, "sync_interval", 60):
+            other = Plugin.objects.create(
+                name="other", plugin_type="service", plugin_name="traited", enabled=True
+            )
+            self.assertEqual(self.get_enum(), [self.traited.pk, other.pk])
+
+            other.enabled = False
+            other.save()
+            self.assertEqual(self.get_enum(), [self.traited.pk])
+
+    def test_changed_by_other_process(self):
+        self.assertEqual(self.get_enum(), [self.traited.pk])
+
+        with mock.patch.object(related_plugin_enum_cache, "sync_interval", 0):
+            Plugin.objects.bulk_create(
+                [
+                    Plugin(
+                        name="other",
+                        plugin_type="service",
+                        plugin_name="traited",
+                        enabled=True,
+                    )
+                ]
+            )
+            other = Plugin.objects.get(name="other")
+            self.assertEqual(self.get_enum(), [self.traited.pk, other.pk])
+
+
+class Vehicle:
+    plugin_type = "vehicle"
+    __traits__ = []
+
+
+class Boat:
+    plugin_type = "boat"
+    __traits__ = []
+
+
+def create_plugin(base, name, priority=0, traits=()):
+    return type(
+        name,
+        (base,),
+        {"plugin_name": name, "priority": priority, "__traits__": list(traits)},
+    )
+
+
+class PluginHandlerTestCase(SimpleTestCase):
+    def setUp(self):
+        self.handler = PluginHandler()
+        self.handler.register_plugin_type(Vehicle)
+        self.handler.register_plugin_type(Boat)
+
+    def test_sorted_plugins(self):
+        car = create_plugin(Vehicle, "car", priority=5)
+        bike = create_plugin(Vehicle, "bike", priority=1)
+        ferry = create_plugin(Boat, "ferry")
+        for cls in (car, bike, ferry):
+            self.handler.register_plugin(cls)
+
+        self.assertEqual(self.handler.get_plugins("vehicle"), (bike, car))
+        self.assertEqual(self.handler.get_all_plugins(), (bike, car, ferry))
+
+    def test_reregister(self):
+        car = create_plugin(Vehicle, "car", priority=5, traits=["wheels"])
+        bike = create_plugin(Vehicle, "bike", priority=1, traits=["wheels"])
+        self.handler.register_plugin(car)
+        self.handler.register_plugin(bike)
+        version = self.handler.version
+
+        new_car = create_plugin(Vehicle, "car", priority=0, traits=["engine"])
+        self.handler.register_plugin(new_car)
+
+        self.assertGreater(self.handler.version, version)
+        self.assertEqual(self.handler.get_plugins("vehicle"), (new_car, bike))
+        self.assertEqual(
+            self.handler.get_plugins_with_traits("vehicle", ["wheels"]), {bike}
+        )
+        self.assertEqual(
+            self.handler.get_plugins_with_traits("vehicle", ["engine"]), {new_car}
+        )
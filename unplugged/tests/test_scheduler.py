@@ -0,0 +1,618 @@
+from datetime import datetime, timedelta, timezone
+
+from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.interval import IntervalTrigger
+from django.conf import settings
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils.timezone import now
+
+from unplugged import Schema, ServicePlugin, command, fields
+
+from ..models import Plugin, Schedule, ScheduleLease, ScheduleRun
+from ..models.scheduler import (
+    FailedToParseScheduleException,
+    OffsetTrigger,
+    _parse_schedule_trigger,
+    get_schedule_offset,
+    parse_schedule_trigger,
+)
+from ..scheduler import CompiledSchedule, ScheduleLeases, ScheduleManager
+
+
+class CountSchema(Schema):
+    count = fields.Integer(required=True)
+
+
+class ScheduledPlugin(ServicePlugin):
+    plugin_name = "scheduled"
+    config_schema = Schema
+
+    counts = []
+
+    @command()
+    def command_work(self):
+        pass
+
+    @command()
+    def command_fail(self):
+        raise ValueError("failed")
+
+    @command(schema=CountSchema)
+    def command_count(self, count):
+        self.counts.append(count)
+
+
+class ScheduleLeasesTestCase(TestCase):
+    def setUp(self):
+        plugin = Plugin.objects.create(
+            name="scheduled", plugin_type="service", plugin_name="scheduled"
+        )
+        self.schedule = Schedule.objects.create(
+            method="interval",
+            method_config="seconds=60",
+            command="work",
+            kwargs={},
+            plugin=plugin,
+            enabled=True,
+        )
+        self.worker_a = ScheduleLeases(60)
+        self.worker_b = ScheduleLeases(60)
+
+    def test_acquire(self):
+        pk, version = self.schedule.pk, self.schedule.version
+        self.assertTrue(self.worker_a.acquire(pk, version))
+        self.assertTrue(self.worker_a.acquire(pk, version))
+        self.assertFalse(self.worker_b.acquire(pk, version))
+        self.assertEqual(ScheduleLease.objects.get(pk=pk).owner, self.worker_a.owner)
+
+    def test_failover(self):
+        pk, version = self.schedule.pk, self.schedule.version
+        self.assertTrue(self.worker_a.acquire(pk, version))
+        ScheduleLease.objects.filter(pk=pk).update(expires=now() - timedelta(seconds=1))
+
+        self.assertTrue(self.worker_b.acquire(pk, version))
+        self.assertFalse(self.worker_a.acquire(pk, version))
+
+    def test_release(self):
+        pk, version = self.schedule.pk, self.schedule.version
+        self.assertTrue(self.worker_a.acquire(pk, version))
+        self.worker_a.release()
+
+        self.assertTrue(self.worker_b.acquire(pk, version))
+
+    def test_disabled_schedule(self):
+        pk, version = self.schedule.pk, self.schedule.version
+        self.assertTrue(self.worker_a.acquire(pk, version))
+        Schedule.objects.filter(pk=pk).update(enabled=False)
+
+        self.assertFalse(self.worker_a.acquire(pk, version))
+        ScheduleLease.objects.all().delete()
+        self.assertFalse(self.worker_a.acquire(pk, version))
+
+    def test_changed_schedule(self):
+        pk, version = self.schedule.pk, self.schedule.version
+        self.assertTrue(self.worker_a.acquire(pk, version))
+        self.schedule.method_config = "seconds=30"
+        self.schedule.save()
+
+        self.assertEqual(self.schedule.version, version + 1)
+        self.assertFalse(self.worker_a.acquire(pk, version))
+        self.assertTrue(self.worker_a.acquire(pk, self.schedule.version))
+
+
+class ScheduleManagerLeaseTestCase(TestCase):
+    """
+    Worker B runs a ScheduleManager, worker A only touches the database like
+    another process would, so no signals reach worker B.
+    """
+
+    def setUp(self):
+        self.plugin = Plugin.objects.create(
+            name="scheduled",
+            plugin_type="service",
+            plugin_name="scheduled",
+            enabled=True,
+        )
+        self.plugin.get_plugin()
+        self.schedule = Schedule.objects.create(
+            method="interval",
+            method_config="seconds=60",
+            command="work",
+            kwargs={},
+            plugin=self.plugin,
+            enabled=True,
+        )
+        self.worker_a = ScheduleLeases(60)
+        self.worker_b = ScheduleManager()
+        self.worker_b.leases = ScheduleLeases(60)
+        self.worker_b.load_schedule(self.schedule)
+
+    def tearDown(self):
+        self.worker_b.plugin_unloaded(None, self.plugin)
+        Plugin.objects.unload_all_plugins()
+
+    def get_job(self):
+        return self.worker_b.schedules[self.plugin.pk].get(self.schedule.pk)
+
+    def test_run(self):
+        self.assertFalse(self.worker_b.run_schedule(self.schedule.pk))
+        self.assertFalse(self.worker_a.acquire(self.schedule.pk))
+
+    def test_disabled_elsewhere(self):
+        self.assertFalse(self.worker_b.run_schedule(self.schedule.pk))
+        Schedule.objects.filter(pk=self.schedule.pk).update(enabled=False)
+
+        self.assertIsNone(self.worker_b.run_schedule(self.schedule.pk))
+        self.assertIsNone(self.get_job())
+
+    def test_deleted_elsewhere(self):
+        Schedule.objects.filter(pk=self.schedule.pk).delete()
+
+        self.assertIsNone(self.worker_b.run_schedule(self.schedule.pk))
+        self.assertIsNone(self.get_job())
+
+    def test_changed_elsewhere(self):
+        self.assertTrue(self.worker_a.acquire(self.schedule.pk))
+        Schedule.objects.filter(pk=self.schedule.pk).update(
+            method_config="seconds=30", version=self.schedule.version + 1
+        )
+
+        self.assertIsNone(self.worker_b.run_schedule(self.schedule.pk))
+        self.assertEqual(
+            self.worker_b.schedule_versions[self.schedule.pk],
+            self.schedule.version + 1,
+        )
+        self.assertEqual(self.get_job().trigger.interval, timedelta(seconds=30))
+
+        ScheduleLease.objects.all().delete()
+        self.assertFalse(self.worker_b.run_schedule(self.schedule.pk))
+
+
+class EnsureSchedulesTestCase(TestCase):
+    def setUp(self):
+        self.plugin = Plugin.objects.create(
+            name="scheduled", plugin_type="service", plugin_name="scheduled"
+        )
+
+    def create_schedule(self, plugin_unique_id, **kwargs):
+        values = {
+            "method": "interval",
+            "method_config": "seconds=60",
+            "command": "work",
+            "kwargs": {},
+            "plugin": self.plugin,
+            "plugin_unique_id": plugin_unique_id,
+            "enabled": True,
+        }
+        values.update(kwargs)
+        return Schedule.objects.create(**values)
+
+    def get_spec(self, plugin_unique_id, method_config="seconds=60"):
+        return {
+            "plugin_unique_id": plugin_unique_id,
+            "method": "interval",
+            "method_config": method_config,
+            "command": "work",
+        }
+
+    def test_ensure_schedules(self):
+        admin_schedules = [self.create_schedule(None), self.create_schedule(None)]
+        unchanged = self.create_schedule("unchanged")
+        updated = self.create_schedule("updated")
+        missing = self.create_schedule("missing")
+
+        changed_schedules = Schedule.objects.ensure_schedules(
+            self.plugin,
+            [
+                self.get_spec("unchanged"),
+                self.get_spec("updated", method_config="seconds=30"),
+                self.get_spec("created"),
+            ],
+        )
+
+        self.assertEqual(
+            sorted(schedule.plugin_unique_id for schedule in changed_schedules),
+            ["created", "missing", "updated"],
+        )
+        for schedule in admin_schedules:
+            schedule.refresh_from_db()
+            self.assertTrue(schedule.enabled)
+
+        unchanged.refresh_from_db()
+        self.assertTrue(unchanged.enabled)
+        self.assertEqual(unchanged.version, 1)
+
+        updated.refresh_from_db()
+        self.assertTrue(updated.enabled)
+        self.assertEqual(updated.method_config, "seconds=30")
+        self.assertEqual(updated.version, 2)
+
+        missing.refresh_from_db()
+        self.assertFalse(missing.enabled)
+
+        created = Schedule.objects.get(plugin_unique_id="created")
+        self.assertTrue(created.enabled)
+        self.assertEqual(created.plugin, self.plugin)
+
+    def test_keep_missing(self):
+        missing = self.create_schedule("missing")
+
+        self.assertEqual(
+            Schedule.objects.ensure_schedules(self.plugin, [], disable_missing=False),
+            [],
+        )
+        missing.refresh_from_db()
+        self.assertTrue(missing.enabled)
+
+
+class ScheduleManagerCompileTestCase(TestCase):
+    def setUp(self):
+        self.plugin = Plugin.objects.create(
+            name="scheduled",
+            plugin_type="service",
+            plugin_name="scheduled",
+            enabled=True,
+        )
+        self.plugin.get_plugin()
+        self.schedule = Schedule.objects.create(
+            method="interval",
+            method_config="seconds=60",
+            command="count",
+            kwargs={"count": "2"},
+            plugin=self.plugin,
+            enabled=True,
+        )
+        self.manager = ScheduleManager()
+        ScheduledPlugin.counts.clear()
+
+    def tearDown(self):
+        self.manager.plugin_unloaded(None, self.plugin)
+        Plugin.objects.unload_all_plugins()
+
+    def test_compiled_on_load(self):
+        self.manager.load_schedule(self.schedule)
+        compiled_schedule = self.manager.compiled_schedules[self.schedule.pk]
+        self.assertIsInstance(compiled_schedule, CompiledSchedule)
+        self.assertEqual(compiled_schedule.command_name, "count")
+
+        with self.assertNumQueries(0):
+            self.assertFalse(self.manager.run_schedule(self.schedule.pk))
+            self.assertFalse(self.manager.run_schedule(self.schedule.pk))
+
+        self.assertEqual(ScheduledPlugin.counts, [2, 2])
+        self.assertEqual(compiled_schedule.kwargs, {"count": "2"})
+
+    def test_compiled_on_first_run(self):
+        self.manager.compiled_schedules.clear()
+        self.manager.schedule_versions[self.schedule.pk] = self.schedule.version
+
+        self.assertFalse(self.manager.run_schedule(self.schedule.pk))
+        self.assertIn(self.schedule.pk, self.manager.compiled_schedules)
+        self.assertEqual(ScheduledPlugin.counts, [2])
+
+    def test_invalid_kwargs(self):
+        self.schedule.kwargs = {"count": "many"}
+        self.schedule.save()
+        self.manager.load_schedule(self.schedule)
+        self.assertNotIn(self.schedule.pk, self.manager.compiled_schedules)
+
+        self.assertTrue(self.manager.run_schedule(self.schedule.pk))
+        self.assertEqual(ScheduledPlugin.counts, [])
+
+    def test_reload(self):
+        self.manager.load_schedule(self.schedule)
+        compiled_schedule = self.manager.compiled_schedules[self.schedule.pk]
+
+        self.schedule.kwargs = {"count": "3"}
+        self.manager.reload_schedule(self.schedule)
+        self.assertIsNot(
+            self.manager.compiled_schedules[self.schedule.pk], compiled_schedule
+        )
+        self.assertFalse(self.manager.run_schedule(self.schedule.pk))
+        self.assertEqual(ScheduledPlugin.counts, [3])
+
+        self.schedule.enabled = False
+        self.manager.reload_schedule(self.schedule)
+        self.assertNotIn(self.schedule.pk, self.manager.compiled_schedules)
+
+
+class ScheduleManagerExecutorTestCase(TestCase):
+    def setUp(self):
+        self.plugin = Plugin.objects.create(
+            name="scheduled",
+            plugin_type="service",
+            plugin_name="scheduled",
+            enabled=True,
+        )
+        self.plugin.get_plugin()
+        self.manager = ScheduleManager()
+
+    def tearDown(self):
+        self.manager.plugin_unloaded(None, self.plugin)
+        Plugin.objects.unload_all_plugins()
+
+    def create_schedule(self, **kwargs):
+        return Schedule.objects.create(
+            method="interval",
+            method_config="seconds=60",
+            command="work",
+            kwargs={},
+            plugin=self.plugin,
+            enabled=True,
+            **kwargs,
+        )
+
+    def get_job(self, schedule):
+        return self.manager.schedules[self.plugin.pk][schedule.pk]
+
+    @override_settings(SCHEDULER_PLUGIN_WORKERS=3)
+    def test_plugin_executor(self):
+        first = self.create_schedule()
+        second = self.create_schedule()
+        self.manager.load_schedule(first)
+        self.manager.load_schedule(second)
+
+        alias = self.manager.get_executor_alias(self.plugin.pk)
+        self.assertEqual(list(self.manager.executors), [self.plugin.pk])
+        self.assertIs(
+            settings.SCHEDULER._executors[alias], self.manager.executors[self.plugin.pk]
+        )
+        self.assertEqual(self.manager.executors[self.plugin.pk]._pool._max_workers, 3)
+        self.assertEqual(self.get_job(first).executor, alias)
+        self.assertEqual(self.get_job(second).executor, alias)
+
+        self.manager.plugin_unloaded(None, self.plugin)
+        self.assertEqual(self.manager.executors, {})
+        self.assertNotIn(alias, settings.SCHEDULER._executors)
+
+    def test_job_options(self):
+        schedule = self.create_schedule(max_instances=3, coalesce=False)
+        self.assertEqual(
+            schedule.get_job_options(), {"max_instances": 3, "coalesce": False}
+        )
+
+        self.manager.load_schedule(schedule)
+        job = self.get_job(schedule)
+        self.assertEqual(job.max_instances, 3)
+        self.assertFalse(job.coalesce)
+
+    def test_job_defaults(self):
+        self.assertEqual(self.create_schedule().get_job_options(), {})
+        self.assertEqual(
+            self.create_schedule(misfire_grace_time=0).get_job_options(),
+            {"misfire_grace_time": 0},
+        )
+
+
+class ScheduleManagerRunTestCase(TestCase):
+    def setUp(self):
+        self.plugin = Plugin.objects.create(
+            name="scheduled",
+            plugin_type="service",
+            plugin_name="scheduled",
+            enabled=True,
+        )
+        self.plugin.get_plugin()
+        self.manager = ScheduleManager()
+
+    def tearDown(self):
+        self.manager.plugin_unloaded(None, self.plugin)
+        Plugin.objects.unload_all_plugins()
+
+    def load_schedule(self, command, kwargs=None):
+        schedule = Schedule.objects.create(
+            method="interval",
+            method_config="seconds=60",
+            command=command,
+            kwargs=kwargs or {},
+            plugin=self.plugin,
+            enabled=True,
+        )
+        self.manager.load_schedule(schedule)
+        return schedule
+
+    def get_statuses(self, schedule):
+        return list(schedule.runs.values_list("status", flat=True))
+
+    def test_record_runs(self):
+        schedule = self.load_schedule("work")
+        self.manager.trigger_schedule(schedule.pk)
+        self.assertEqual(self.get_statuses(schedule), [ScheduleRun.STATUS_SUCCESS])
+
+        schedule = self.load_schedule("fail")
+        self.manager.trigger_schedule(schedule.pk)
+        self.assertEqual(self.get_statuses(schedule), [ScheduleRun.STATUS_FAILED])
+
+    def test_record_prepare_failure(self):
+        schedule = self.load_schedule("count", {"count": "many"})
+        self.manager.trigger_schedule(schedule.pk)
+        self.assertEqual(self.get_statuses(schedule), [ScheduleRun.STATUS_FAILED])
+
+    def test_not_run(self):
+        schedule = self.load_schedule("work")
+        Schedule.objects.filter(pk=schedule.pk).delete()
+        self.manager.compiled_schedules.clear()
+
+        self.manager.trigger_schedule(schedule.pk)
+        self.assertFalse(ScheduleRun.objects.exists())
+
+    def test_rollup(self):
+        schedule = self.load_schedule("work")
+        start_datetime = now()
+        for duration, status in [
+            (0.001, ScheduleRun.STATUS_SUCCESS),
+            (0.2, ScheduleRun.STATUS_SUCCESS),
+            (3.0, ScheduleRun.STATUS_FAILED),
+        ]:
+            ScheduleRun.objects.create(
+                schedule=schedule,
+                planned_datetime=start_datetime - timedelta(seconds=1),
+                start_datetime=start_datetime,
+                duration=duration,
+                status=status,
+            )
+
+        rollup = self.manager.get_rollup(schedule.pk).serialize()
+        self.assertEqual(rollup["runs"], 3)
+        self.assertEqual(rollup["failures"], 1)
+        self.assertEqual(rollup["lag_average"], 1.0)
+        self.assertEqual(
+            self.manager.get_rollup(schedule.pk + 1).serialize()["runs"], 0
+        )
+
+    @override_settings(SCHEDULE_RUN_HISTORY=1)
+    def test_trim(self):
+        self.manager.trim_interval = 2
+        schedule = self.load_schedule("work")
+
+        runs = []
+        for i in range(4):
+            self.manager.trigger_schedule(schedule.pk)
+            runs.append(schedule.runs.count())
+        self.assertEqual(runs, [1, 1, 2, 1])
+
+
+class ScheduleManagerPrefetchTestCase(TestCase):
+    def setUp(self):
+        self.plugin = Plugin.objects.create(
+            name="scheduled",
+            plugin_type="service",
+            plugin_name="scheduled",
+            enabled=True,
+        )
+        self.plugin.get_plugin()
+        self.enabled = self.create_schedule(enabled=True)
+        self.disabled = self.create_schedule(enabled=False)
+        self.manager = ScheduleManager()
+
+    def tearDown(self):
+        self.manager.plugin_unloaded(None, self.plugin)
+        Plugin.objects.unload_all_plugins()
+
+    def create_schedule(self, enabled):
+        return Schedule.objects.create(
+            method="interval",
+            method_config="seconds=60",
+            command="work",
+            kwargs={},
+            plugin=self.plugin,
+            enabled=enabled,
+        )
+
+    def get_loaded_pks(self):
+        return sorted(self.manager.schedules.get(self.plugin.pk, {}))
+
+    def test_prefetched(self):
+        with self.assertNumQueries(1):
+            self.manager.prefetch_schedules()
+        self.assertEqual(
+            list(self.manager.prefetched_schedules[self.plugin.pk]), [self.enabled.pk]
+        )
+
+        with self.assertNumQueries(0):
+            self.manager.plugin_loaded(None, self.plugin)
+        self.assertEqual(self.get_loaded_pks(), [self.enabled.pk])
+        self.assertNotIn(self.plugin.pk, self.manager.prefetched_schedules)
+
+    def test_modified_before_load(self):
+        self.manager.prefetch_schedules()
+        self.disabled.enabled = True
+        self.manager.schedule_modified(None, self.disabled, created=False)
+        self.enabled.enabled = False
+        self.manager.schedule_modified(None, self.enabled, created=False)
+
+        self.manager.plugin_unloaded(None, self.plugin)
+        with self.assertNumQueries(0):
+            self.manager.plugin_loaded(None, self.plugin)
+        self.assertEqual(self.get_loaded_pks(), [self.disabled.pk])
+
+    def test_cleared(self):
+        self.manager.prefetch_schedules()
+        self.manager.clear_prefetched_schedules()
+
+        with self.assertNumQueries(1):
+            self.manager.plugin_loaded(None, self.plugin)
+        self.assertEqual(self.get_loaded_pks(), [self.enabled.pk])
+
+
+class OffsetTriggerTestCase(SimpleTestCase):
+    def get_datetime(self, minute, second):
+        return datetime(2020, 1, 1, 12, minute, second, tzinfo=timezone.utc)
+
+    def test_fire_times(self):
+        trigger = OffsetTrigger(CronTrigger(minute="*/5", timezone="UTC"), 30)
+
+        self.assertEqual(
+            trigger.get_next_fire_time(None, self.get_datetime(0, 10)),
+            self.get_datetime(0, 30),
+        )
+        self.assertEqual(
+            trigger.get_next_fire_time(None, self.get_datetime(0, 31)),
+            self.get_datetime(5, 30),
+        )
+        self.assertEqual(
+            trigger.get_next_fire_time(
+                self.get_datetime(0, 30), self.get_datetime(0, 30)
+            ),
+            self.get_datetime(5, 30),
+        )
+
+    def test_schedule_offset(self):
+        offsets = [get_schedule_offset(pk, 60) for pk in range(1, 101)]
+        self.assertEqual(offsets, [get_schedule_offset(pk, 60) for pk in range(1, 101)])
+        self.assertTrue(all(0 <= offset <= 60 for offset in offsets))
+        self.assertGreater(len(set(offsets)), 30)
+
+    def get_schedule(self, method="cron", **kwargs):
+        method_config = "0 */5" if method == "cron" else "minutes=5"
+        return Schedule(pk=2, method=method, method_config=method_config, **kwargs)
+
+    def test_jitter(self):
+        self.assertEqual(self.get_schedule(jitter=10).get_offset(), 8)
+        self.assertEqual(self.get_schedule("interval", jitter=10).get_offset(), 8)
+        self.assertEqual(self.get_schedule().get_offset(), 0)
+
+        trigger = self.get_schedule(jitter=10).get_trigger()
+        self.assertIsInstance(trigger, OffsetTrigger)
+        self.assertEqual(trigger.offset, timedelta(seconds=8))
+
+    @override_settings(SCHEDULE_SPREAD_WINDOW=60)
+    def test_spread_window(self):
+        self.assertEqual(self.get_schedule().get_offset(), 15)
+        self.assertEqual(self.get_schedule("interval").get_offset(), 0)
+        self.assertEqual(self.get_schedule(jitter=0).get_offset(), 0)
+        self.assertEqual(Schedule(method="cron", method_config="0").get_offset(), 0)
+
+        self.assertIsInstance(self.get_schedule(jitter=0).get_trigger(), CronTrigger)
+
+
+class ParseScheduleTriggerTestCase(SimpleTestCase):
+    def setUp(self):
+        _parse_schedule_trigger.cache_clear()
+
+    def test_cron(self):
+        trigger = parse_schedule_trigger("cron", "0 */5")
+        self.assertIsInstance(trigger, CronTrigger)
+        self.assertIs(parse_schedule_trigger("cron", "0 */5"), trigger)
+        self.assertEqual(_parse_schedule_trigger.cache_info().hits, 1)
+
+    def test_interval(self):
+        trigger = parse_schedule_trigger("interval", "minutes=5 seconds=30")
+        self.assertIsInstance(trigger, IntervalTrigger)
+        self.assertEqual(trigger.interval, timedelta(minutes=5, seconds=30))
+
+        other_trigger = parse_schedule_trigger("interval", "minutes=5 seconds=30")
+        self.assertIsNot(other_trigger, trigger)
+        self.assertEqual(other_trigger.interval, trigger.interval)
+        self.assertEqual(_parse_schedule_trigger.cache_info().hits, 1)
+
+    def test_invalid(self):
+        for method, config in [
+            ("cron", "0 99"),
+            ("interval", "minutes"),
+            ("interval", "months=1"),
+            ("daily", "0"),
+        ]:
+            for i in range(2):
+                with self.assertRaises(FailedToParseScheduleException):
+                    parse_schedule_trigger(method, config)
@@ -47,10 +47,7 @@ class PluginBaseSerializer(serializers.Serializer):
         return dump_ui_schema(schema)
 
     def get_traits(self, obj):
-        if hasattr(obj, "__trait__"):
-            return obj.__trait__
-        else:
-            return []
+        return list(getattr(obj, "__traits__", []))
 
     def id(self, obj):
         return f"{obj.plugin_type}:{obj.plugin_name}"
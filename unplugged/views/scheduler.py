@@ -14,7 +14,7 @@ class ScheduleSerializer(serializers.HyperlinkedModelSerializer):
     class Meta:
         model = Schedule
         fields = "__all__"
-        read_only_fields = ["plugin"]
+        read_only_fields = ["plugin", "version"]
 
     class JSONAPIMeta:
         resource_name = "schedule"